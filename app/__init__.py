@@ -10,6 +10,10 @@ def create_app():
     app = Flask(__name__, template_folder="templates", static_folder="static")
     app.config.from_object("app.config.Config")
 
+    # ObjectId/datetime-aware JSON so routes can return Mongo documents as-is
+    from app.json_provider import MongoJSONProvider
+    app.json = MongoJSONProvider(app)
+
     # ✅ Allow both localhost and 127.0.0.1 for development
     CORS(
         app,
@@ -30,4 +34,16 @@ def create_app():
     from app.auth import auth_bp
     app.register_blueprint(auth_bp)
 
+    # Fingerprinted, precompressed static files (asset_url() in templates)
+    from app.assets import init_assets
+    init_assets(app)
+
+    # Per-endpoint/per-stage timings on /metrics
+    from app.metrics import init_metrics
+    init_metrics(app)
+
+    # Optional eager model load (ASR_PRELOAD)
+    from app.asr import init_asr
+    init_asr(app)
+
     return app
@@ -1,8 +1,29 @@
 # app/asr.py
+import dataclasses
+import itertools
+import logging
 import os
 import subprocess
+import threading
+import time
+import wave
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+
+from app.metrics import stage, process_memory, ASR_MODEL_LOAD
+
+log = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000  # what Whisper consumes
+
+_ffmpeg_checked = False
 
 def _ensure_ffmpeg():
+    # Spawning `ffmpeg -version` costs a process per request; one success is enough
+    global _ffmpeg_checked
+    if _ffmpeg_checked:
+        return
     try:
         subprocess.run(
             ["ffmpeg", "-version"],
@@ -16,24 +37,315 @@ def _ensure_ffmpeg():
             "(macOS: 'brew install ffmpeg', Ubuntu: 'sudo apt-get install -y ffmpeg', "
             "Windows: download from ffmpeg.org and add to PATH)."
         )
+    _ffmpeg_checked = True
+
+# ---------- Audio decoding fast path ----------
+# The recorder sends 16 kHz mono Opus in WebM/Ogg. For those (and for 16 kHz mono
+# PCM WAV) we decode ourselves instead of letting whisper.load_audio() have ffmpeg
+# probe an unknown container: WAV needs no ffmpeg at all, WebM/Ogg gets the demuxer
+# named up front. Anything else still goes through Whisper's generic path.
+
+# ffmpeg demuxer names by container
+_DEMUXERS = {"webm": "matroska", "ogg": "ogg"}
+
+def sniff_container(audio_path: str):
+    """Return 'wav' | 'webm' | 'ogg' | None from magic bytes; browsers mislabel MIME types."""
+    try:
+        with open(audio_path, "rb") as fh:
+            head = fh.read(12)
+    except OSError:
+        return None
+    if head[:4] == b"RIFF" and head[8:12] == b"WAVE":
+        return "wav"
+    if head[:4] == b"\x1a\x45\xdf\xa3":
+        return "webm"
+    if head[:4] == b"OggS":
+        return "ogg"
+    return None
+
+def _decode_wav(audio_path: str):
+    import numpy as np
+
+    with wave.open(audio_path, "rb") as w:
+        if w.getframerate() != SAMPLE_RATE or w.getnchannels() != 1 or w.getsampwidth() != 2:
+            return None
+        pcm = w.readframes(w.getnframes())
+    return np.frombuffer(pcm, np.int16).astype(np.float32) / 32768.0
+
+def _decode_with_ffmpeg(audio_path: str, container: str):
+    import numpy as np
 
-def transcribe_with_whisper(audio_path: str) -> str:
     _ensure_ffmpeg()
+    cmd = [
+        "ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error",
+        "-f", _DEMUXERS[container], "-analyzeduration", "0",
+        "-i", audio_path,
+        "-f", "s16le", "-ac", "1", "-ar", str(SAMPLE_RATE), "-",
+    ]
+    out = subprocess.run(cmd, capture_output=True, check=True).stdout
+    return np.frombuffer(out, np.int16).astype(np.float32) / 32768.0
 
+def load_audio(audio_path: str):
+    """
+    Decode a known upload format to 16 kHz mono float32 samples, or return None
+    to let the ASR engine decode `audio_path` itself.
+    """
+    container = sniff_container(audio_path)
     try:
-        import whisper  # pip install openai-whisper
-    except Exception as e:
-        raise RuntimeError(
-            "Python package 'openai-whisper' is not installed. "
-            "Install with: pip install openai-whisper torch --extra-index-url https://download.pytorch.org/whl/cu121"
-        ) from e
+        if container == "wav":
+            return _decode_wav(audio_path)
+        if container in _DEMUXERS:
+            return _decode_with_ffmpeg(audio_path, container)
+    except (subprocess.CalledProcessError, wave.Error, EOFError):
+        return None  # let the generic path try (and report) it
+    return None
+
+# ---------- Backends ----------
+# ASR engines register under a name; Config.ASR_BACKEND (or ASR_BACKEND_EXPENSES /
+# ASR_BACKEND_GOALS per endpoint) picks one. Each backend loads its model once per
+# process and reuses it. "browser" is not a backend: the routes then trust the
+# client's `transcript` form field.
+
+_BACKENDS = {}
+
+def register_backend(name):
+    def deco(cls):
+        cls.name = name
+        _BACKENDS[name] = cls
+        return cls
+    return deco
+
+def available_backends():
+    return sorted(_BACKENDS)
+
+class ASRBackend(ABC):
+    name = None
+    # The model is shared by every request thread and the background worker.
+    # Backends whose inference mutates the model set this False to run one call at a time.
+    thread_safe = True
+
+    def __init__(self):
+        self._model = None
+        self._lock = threading.Lock()
+        self._run_lock = nullcontext() if self.thread_safe else threading.Lock()
+        self.load_source = "load"  # "mmap" when the weights are mapped from a shared file
+
+    @abstractmethod
+    def load_model(self):
+        """Load and return the model; called once per process."""
+
+    @abstractmethod
+    def _run(self, model, audio):
+        """Transcribe `audio` (float32 16 kHz samples or a file path) and return the text."""
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    t0 = time.perf_counter()
+                    with stage("model_load"):
+                        self._model = self.load_model()
+                    elapsed = time.perf_counter() - t0
+                    ASR_MODEL_LOAD.set((str(os.getpid()), self.name, self.load_source), elapsed)
+                    mem = process_memory()
+                    log.info(
+                        "pid %d loaded ASR backend %s (%s) in %.3fs: rss_anon=%.0fMB rss_file=%.0fMB pss=%.0fMB",
+                        os.getpid(), self.name, self.load_source, elapsed,
+                        mem.get("rss_anon", 0) / 2**20, mem.get("rss_file", 0) / 2**20, mem.get("pss", 0) / 2**20,
+                    )
+        return self._model
+
+    def transcribe(self, audio_path: str) -> str:
+        with stage("decode"):
+            audio = load_audio(audio_path)
+        model = self.model
+        with stage("transcribe"), self._run_lock:
+            text = self._run(model, audio if audio is not None else audio_path)
+        return (text or "").strip()
+
+@register_backend("whisper")
+class WhisperBackend(ASRBackend):
+    """openai-whisper, full precision PyTorch."""
+
+    # Decoding installs kv-cache forward hooks on the shared decoder modules;
+    # concurrent calls would collect each other's keys/values
+    thread_safe = False
 
-    # Small models are fast and good enough
-    model_name = os.environ.get("WHISPER_MODEL", "base")
+    def load_model(self):
+        try:
+            import whisper  # pip install openai-whisper
+        except Exception as e:
+            raise RuntimeError(
+                "Python package 'openai-whisper' is not installed. "
+                "Install with: pip install openai-whisper torch --extra-index-url https://download.pytorch.org/whl/cu121"
+            ) from e
+        # Small models are fast and good enough
+        name = os.environ.get("WHISPER_MODEL", "base")
+        path = shared_weights_path(name)
+        if path:
+            if not os.path.exists(path):
+                export_shared_weights(name, path)
+            self.load_source = "mmap"
+            return load_shared_weights(path)
+        return whisper.load_model(name)
+
+    def _run(self, model, audio):
+        if isinstance(audio, str):
+            _ensure_ffmpeg()  # whisper.load_audio shells out to ffmpeg
+        return model.transcribe(audio, language="en").get("text")
+
+@register_backend("faster-whisper")
+class FasterWhisperBackend(ASRBackend):
+    """CTranslate2 Whisper (faster-whisper), int8-quantized on CPU by default."""
+
+    def load_model(self):
+        try:
+            from faster_whisper import WhisperModel  # pip install faster-whisper
+        except Exception as e:
+            raise RuntimeError(
+                "Python package 'faster-whisper' is not installed. Install with: pip install faster-whisper"
+            ) from e
+        return WhisperModel(
+            os.environ.get("WHISPER_MODEL", "base"),
+            device=os.environ.get("ASR_DEVICE", "cpu"),
+            compute_type=os.environ.get("ASR_COMPUTE_TYPE", "int8"),
+            cpu_threads=int(os.environ.get("ASR_CPU_THREADS", "0")),
+        )
+
+    def _run(self, model, audio):
+        # Greedy decoding: utterances are one short sentence, beam search buys little here
+        segments, _info = model.transcribe(audio, language="en", beam_size=1, vad_filter=True)
+        return " ".join(seg.text.strip() for seg in segments)
+
+@register_backend("fake")
+class FakeBackend(ASRBackend):
+    """Deterministic stand-in for tests and load runs: returns FAKE_ASR_TEXT, no model."""
+
+    def load_model(self):
+        return os.environ.get("FAKE_ASR_TEXT", "spent 100 on tea via upi")
+
+    def _run(self, model, audio):
+        return model
+
+    def transcribe(self, audio_path: str) -> str:
+        if not os.path.exists(audio_path):
+            raise RuntimeError(f"audio file not found: {audio_path}")
+        return self.model
+
+# ---------- Shared model weights ----------
+# whisper.load_model() decompresses the fp16 checkpoint into fresh fp32 tensors,
+# so every worker process holds a private copy (hundreds of MB to GBs). With
+# ASR_SHARED_WEIGHTS=<dir>, the whisper backend instead keeps an fp32 copy of each
+# model in <dir> and torch.load(mmap=True)s it: tensors point straight into the
+# page cache, every worker on the host maps the same physical pages (rss_file,
+# not rss_anon, in /metrics), and loading a new worker only reads the file index.
+# The file is written on first use, or ahead of deploys with
+# `python -m scripts.export_asr_weights`. Only for CPU inference.
+
+def shared_weights_path(model_name):
+    root = os.environ.get("ASR_SHARED_WEIGHTS")
+    if not root:
+        return None
+    # WHISPER_MODEL may be a checkpoint path as well as a model name
+    stem = os.path.splitext(os.path.basename(model_name))[0]
+    return os.path.join(root, f"whisper-{stem}.fp32.pt")
+
+def export_shared_weights(model_name, path):
+    """Write every parameter and buffer of a whisper model as fp32 tensors to `path`."""
+    import torch
+    import whisper
+
+    model = whisper.load_model(model_name, device="cpu")
+    tensors, sparse = {}, []
+    for name, t in itertools.chain(model.named_parameters(), model.named_buffers()):
+        if t.is_sparse:  # alignment_heads; mmap'd files hold dense tensors only
+            t = t.to_dense()
+            sparse.append(name)
+        tensors[name] = t.detach().contiguous()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    torch.save({"dims": dataclasses.asdict(model.dims), "tensors": tensors, "sparse": sparse}, tmp)
+    # Workers racing to export write identical files; the rename is atomic
+    os.replace(tmp, path)
+
+def load_shared_weights(path):
+    import torch
+    from whisper.model import ModelDimensions, Whisper
+
+    ckpt = torch.load(path, map_location="cpu", mmap=True, weights_only=True)
+    try:
+        with torch.device("meta"):
+            model = Whisper(ModelDimensions(**ckpt["dims"]))  # no allocation, no random init
+    except (NotImplementedError, RuntimeError):
+        model = Whisper(ModelDimensions(**ckpt["dims"]))
+    sparse = set(ckpt["sparse"])
+    for name, t in ckpt["tensors"].items():
+        module_name, _, attr = name.rpartition(".")
+        module = model.get_submodule(module_name)
+        if name in sparse:
+            t = t.to_sparse()
+        if attr in module._parameters:
+            module._parameters[attr] = torch.nn.Parameter(t, requires_grad=False)
+        else:
+            module._buffers[attr] = t
+    if any(t.is_meta for t in itertools.chain(model.parameters(), model.buffers())):
+        raise RuntimeError(f"{path} does not match the installed whisper version; delete it to re-export")
+    return model.eval()
+
+_instances = {}
+
+def get_backend(name: str) -> ASRBackend:
+    if name not in _BACKENDS:
+        raise RuntimeError(f"Unknown ASR backend '{name}'. Available: {', '.join(available_backends())}")
+    inst = _instances.get(name)
+    if inst is None:
+        inst = _instances.setdefault(name, _BACKENDS[name]())
+    return inst
+
+def init_asr(app):
+    """
+    With ASR_PRELOAD, load the configured backends' models at startup instead of
+    on the first voice request. Under `gunicorn --preload` that happens once in
+    the master and forked workers inherit the loaded model.
+    """
+    cfg = app.config
+    if not cfg.get("ASR_PRELOAD"):
+        return
+    names = {cfg.get("ASR_BACKEND"), cfg.get("ASR_BACKEND_EXPENSES"), cfg.get("ASR_BACKEND_GOALS")}
+    if "hybrid" in names:
+        names.add(cfg.get("ASR_HYBRID_ENGINE", "whisper"))
+    for name in sorted(n for n in names if n in _BACKENDS):
+        get_backend(name).model
+
+def transcribe(audio_path: str, backend: str = "whisper") -> str:
+    engine = get_backend(backend)
     try:
-        model = whisper.load_model(model_name)
-        result = model.transcribe(audio_path, language="en")
-        return (result.get("text") or "").strip()
+        return engine.transcribe(audio_path)
+    except RuntimeError:
+        raise
     except Exception as e:
         # Typically decoding failure or torch/ffmpeg issues
-        raise RuntimeError(f"Whisper/ffmpeg failed to transcribe: {e}") from e
+        raise RuntimeError(f"{backend}/ffmpeg failed to transcribe: {e}") from e
+
+# ---------- Background verification ----------
+# One worker per process: deferred transcriptions queue up instead of competing
+# with request-path inference for CPU.
+_background = None
+_background_lock = threading.Lock()
+
+def submit_background(app, fn, *args):
+    """Run fn(*args) inside an app context on the background ASR worker."""
+    global _background
+    with _background_lock:
+        if _background is None:
+            _background = ThreadPoolExecutor(max_workers=1, thread_name_prefix="asr-background")
+
+    def run():
+        with app.app_context():
+            try:
+                fn(*args)
+            except Exception:
+                log.exception("background ASR job failed")
+
+    return _background.submit(run)
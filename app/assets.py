@@ -0,0 +1,112 @@
+# app/assets.py
+"""
+Fingerprinted, precompressed static assets.
+
+`python -m scripts.build_static` writes minified copies of app/static/* to
+app/static/dist/ under content-hashed names (js/app.3f2a1b9c.js) with .gz/.br
+siblings, plus manifest.json mapping original -> hashed path.
+
+Templates call `asset_url('js/app.js')`. With a manifest this resolves to
+/assets/js/app.<hash>.js, served with the best precompressed variant the client
+accepts and `Cache-Control: immutable`. Without a build, in debug mode, or for
+files whose source no longer matches the build (a stale dist/), it falls back
+to the plain /static/ URL.
+"""
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+
+from flask import Blueprint, abort, current_app, request, send_from_directory, url_for
+
+log = logging.getLogger(__name__)
+
+assets_bp = Blueprint("assets", __name__)
+
+DIST_DIR = "dist"
+MANIFEST = "manifest.json"
+ONE_YEAR = 365 * 24 * 3600
+
+# (Accept-Encoding token, file suffix), most preferred first
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def dist_path(app):
+    return os.path.join(app.static_folder, DIST_DIR)
+
+
+def _source_sha256(app, rel):
+    try:
+        with open(os.path.join(app.static_folder, rel), "rb") as fh:
+            return hashlib.sha256(fh.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def load_manifest(app):
+    """original path -> hashed path, for entries whose source still matches the build."""
+    path = os.path.join(dist_path(app), MANIFEST)
+    try:
+        with open(path, encoding="utf-8") as fh:
+            entries = json.load(fh)
+    except (OSError, ValueError):
+        return {}
+
+    manifest, stale = {}, []
+    for rel, entry in entries.items():
+        # Older builds stored only the hashed name and can't be verified
+        if isinstance(entry, dict) and entry.get("source_sha256") == _source_sha256(app, rel):
+            manifest[rel] = entry["file"]
+        else:
+            stale.append(rel)
+    if stale:
+        log.warning(
+            "static build is stale for %s; serving them from /static/. Rerun `python -m scripts.build_static`.",
+            ", ".join(sorted(stale)),
+        )
+    return manifest
+
+
+def asset_url(filename):
+    hashed = current_app.extensions.get("asset_manifest", {}).get(filename)
+    if hashed:
+        return url_for("assets.asset", filename=hashed)
+    return url_for("static", filename=filename)
+
+
+def _accepts(encoding):
+    for part in request.headers.get("Accept-Encoding", "").split(","):
+        token, _, params = part.strip().partition(";")
+        if token.strip().lower() == encoding and params.replace(" ", "") not in ("q=0", "q=0.0"):
+            return True
+    return False
+
+
+@assets_bp.route("/assets/<path:filename>", methods=["GET"])
+def asset(filename):
+    root = dist_path(current_app)
+    if filename == MANIFEST:
+        abort(404)
+    mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+    served, encoding = filename, None
+    for enc, suffix in ENCODINGS:
+        if _accepts(enc) and os.path.isfile(os.path.join(root, filename + suffix)):
+            served, encoding = filename + suffix, enc
+            break
+
+    resp = send_from_directory(root, served, mimetype=mimetype, max_age=ONE_YEAR)
+    if encoding:
+        resp.headers["Content-Encoding"] = encoding
+    resp.headers["Vary"] = "Accept-Encoding"
+    # The name changes whenever the content does, so clients never need to revalidate
+    resp.headers["Cache-Control"] = f"public, max-age={ONE_YEAR}, immutable"
+    return resp
+
+
+def init_assets(app):
+    # In debug, files change under the running app: always serve the sources
+    app.extensions["asset_manifest"] = {} if app.debug else load_manifest(app)
+    app.add_template_global(asset_url)
+    app.register_blueprint(assets_bp)
@@ -2,6 +2,7 @@
 from flask import Blueprint, request, jsonify, session
 from werkzeug.security import generate_password_hash, check_password_hash
 from app.models import get_db
+from app.metrics import stage
 from datetime import datetime
 
 # ✅ Mount under /api/auth to match the frontend (API_BASE + /auth/...)
@@ -21,10 +22,13 @@ def signup():
     if db.users.find_one({"email": email}):
         return jsonify({"error": "Email already exists"}), 400
 
+    with stage("password_hash"):
+        password_hash = generate_password_hash(password)
+
     user = {
         "username": username,
         "email": email,
-        "password_hash": generate_password_hash(password),
+        "password_hash": password_hash,
         "created_at": datetime.utcnow(),
     }
     result = db.users.insert_one(user)
@@ -46,7 +50,9 @@ def login():
 
     db = get_db()
     user = db.users.find_one({"email": email})
-    if not user or not check_password_hash(user["password_hash"], password):
+    with stage("password_hash"):
+        ok = bool(user) and check_password_hash(user["password_hash"], password)
+    if not ok:
         return jsonify({"error": "Invalid credentials"}), 401
 
     session["user_id"] = str(user["_id"])
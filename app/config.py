@@ -4,4 +4,31 @@ class Config:
     SECRET_KEY = os.environ.get("SECRET_KEY", "devsecret")
     MONGO_URI = os.environ.get("MONGO_URI", "mongodb://localhost:27017/voice_expense")
     # ASR options
-    ASR_BACKEND = os.environ.get("ASR_BACKEND", "whisper")  # or "browser"
+    ASR_BACKEND = os.environ.get("ASR_BACKEND", "whisper")  # "faster-whisper", "fake", "browser" or "hybrid"
+    # Per-endpoint overrides, e.g. cheap int8 engine for expenses only
+    ASR_BACKEND_EXPENSES = os.environ.get("ASR_BACKEND_EXPENSES")
+    ASR_BACKEND_GOALS = os.environ.get("ASR_BACKEND_GOALS")
+    # "hybrid": trust the browser transcript when it parses with confidence >= threshold,
+    # else run ASR_HYBRID_ENGINE (inline, or after saving when ASR_VERIFY_IN_BACKGROUND=1).
+    # The default 0.8 needs both signals: amount + category (expenses), amount + existing goal (goals)
+    ASR_HYBRID_ENGINE = os.environ.get("ASR_HYBRID_ENGINE", "whisper")
+    ASR_CONFIDENCE_THRESHOLD = float(os.environ.get("ASR_CONFIDENCE_THRESHOLD", "0.8"))
+    ASR_VERIFY_IN_BACKGROUND = os.environ.get("ASR_VERIFY_IN_BACKGROUND", "0") == "1"
+    # Load ASR models in create_app() instead of on the first voice request; with
+    # `gunicorn --preload` the master loads once and workers inherit it. Set
+    # ASR_SHARED_WEIGHTS=<dir> to memory-map whisper weights shared by all workers.
+    ASR_PRELOAD = os.environ.get("ASR_PRELOAD", "0") == "1"
+    # Read archived per-month expense buckets alongside live expenses (see scripts/compact_expenses.py)
+    EXPENSE_BUCKETS = os.environ.get("EXPENSE_BUCKETS", "0") == "1"
+    # How long Idempotency-Key responses are kept for replay
+    IDEMPOTENCY_TTL_SECONDS = int(os.environ.get("IDEMPOTENCY_TTL_SECONDS", str(24 * 3600)))
+    # How long an in-flight request owns its key before a retry may take it over;
+    # keep it above the slowest voice request (gunicorn timeout)
+    IDEMPOTENCY_LEASE_SECONDS = int(os.environ.get("IDEMPOTENCY_LEASE_SECONDS", "120"))
+    # Instrumentation: /metrics endpoint and slow-request log (0 disables the log)
+    METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") == "1"
+    SLOW_REQUEST_MS = float(os.environ.get("SLOW_REQUEST_MS", "0"))
+    # Required with more than one worker: shared directory where each worker writes its
+    # series so /metrics can sum them (empty it before starting the server)
+    METRICS_MULTIPROC_DIR = os.environ.get("METRICS_MULTIPROC_DIR")
+    METRICS_FLUSH_SECONDS = float(os.environ.get("METRICS_FLUSH_SECONDS", "5"))
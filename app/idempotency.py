@@ -0,0 +1,154 @@
+# app/idempotency.py
+"""
+Idempotency-Key support for write endpoints.
+
+A client sends `Idempotency-Key: <uuid>` and may retry the same request as often
+as it likes. The first request claims the key in `idempotency_keys`; once it
+finishes, its response (status + body) is stored there. Replays of a finished
+key return the stored response immediately, without re-parsing, re-transcribing
+or re-writing. A retry that arrives while the first attempt is still running
+gets 409 with Retry-After, so the client waits and retries with the same key.
+
+Each claim stores a fingerprint of the request (method, path and body); reusing
+a key for a different request gets 422 instead of someone else's response.
+
+A claim is a lease (IDEMPOTENCY_LEASE_SECONDS). If the worker holding it dies
+mid-request (e.g. a gunicorn timeout during ASR), the next retry after the lease
+runs out takes the key over; the dead attempt can no longer store its result.
+Server errors (5xx) release the key so the retry actually runs again.
+
+Keys expire through a TTL index on created_at (IDEMPOTENCY_TTL_SECONDS), created
+or adjusted by `python -m scripts.idempotency_index`, never on the request path.
+"""
+import hashlib
+import math
+import uuid
+from datetime import datetime, timedelta
+from functools import wraps
+
+from flask import current_app, jsonify, request, session
+from pymongo.errors import DuplicateKeyError
+
+from app.models import get_db
+
+HEADER = "Idempotency-Key"
+COLLECTION = "idempotency_keys"
+MAX_KEY_LENGTH = 255
+# Longest Retry-After we send: clients poll at least this often for the first attempt's result
+MAX_RETRY_AFTER = 5
+
+
+def ensure_idempotency_indexes(db=None, ttl=None):
+    """Create the created_at TTL index, or change its expiry in place when `ttl` changed."""
+    db = db if db is not None else get_db()
+    ttl = ttl if ttl is not None else int(current_app.config.get("IDEMPOTENCY_TTL_SECONDS", 24 * 3600))
+    coll = db[COLLECTION]
+    for spec in coll.index_information().values():
+        if list(spec["key"]) == [("created_at", 1)]:
+            if spec.get("expireAfterSeconds") != ttl:
+                db.command("collMod", COLLECTION, index={"keyPattern": {"created_at": 1}, "expireAfterSeconds": ttl})
+            return
+    coll.create_index("created_at", expireAfterSeconds=ttl)
+
+
+def request_fingerprint():
+    """sha256 over method, path and body; multipart bodies by field and file content, not bytes."""
+    h = hashlib.sha256(f"{request.method} {request.full_path}\n".encode())
+    if request.mimetype in ("multipart/form-data", "application/x-www-form-urlencoded"):
+        # The browser picks a new multipart boundary on every retry
+        for name in sorted(request.form):
+            for value in request.form.getlist(name):
+                h.update(f"{name}={value}\n".encode())
+        for name in sorted(request.files):
+            for f in request.files.getlist(name):
+                h.update(f"{name}:".encode())
+                for chunk in iter(lambda: f.stream.read(1 << 16), b""):
+                    h.update(chunk)
+                f.stream.seek(0)
+    else:
+        h.update(request.get_data())
+    return h.hexdigest()
+
+
+def _replay(doc):
+    resp = current_app.response_class(doc["body"], status=doc["status"], mimetype=doc.get("mimetype"))
+    resp.headers["Idempotent-Replayed"] = "true"
+    return resp
+
+
+def _in_progress(lease_until, now):
+    resp = jsonify({"error": "A request with this Idempotency-Key is still in progress"})
+    resp.status_code = 409
+    remaining = (lease_until - now).total_seconds() if lease_until else MAX_RETRY_AFTER
+    resp.headers["Retry-After"] = str(max(1, min(math.ceil(remaining), MAX_RETRY_AFTER)))
+    return resp
+
+
+def _claim(db, doc_id, fingerprint, now, lease):
+    """Return (token, None) if this request owns the key now, else (None, response)."""
+    token = uuid.uuid4().hex
+    lease_until = now + lease
+    try:
+        db[COLLECTION].insert_one({
+            "_id": doc_id, "state": "pending", "owner": token, "lease_until": lease_until,
+            "fingerprint": fingerprint, "created_at": now,
+        })
+        return token, None
+    except DuplicateKeyError:
+        pass
+
+    existing = db[COLLECTION].find_one({"_id": doc_id})
+    if existing and existing.get("fingerprint") not in (None, fingerprint):
+        return None, (jsonify({"error": f"{HEADER} was already used for a different request"}), 422)
+    if existing and existing.get("state") == "done":
+        return None, _replay(existing)
+    if existing and existing.get("lease_until") and existing["lease_until"] <= now:
+        # The previous attempt outlived its lease (worker killed?): take the key over
+        taken = db[COLLECTION].update_one(
+            {"_id": doc_id, "state": "pending", "owner": existing.get("owner")},
+            {"$set": {"owner": token, "lease_until": lease_until}},
+        )
+        if taken.modified_count:
+            return token, None
+    return None, _in_progress(existing.get("lease_until") if existing else None, now)
+
+
+def idempotent(view):
+    """Decorate a route so requests carrying an Idempotency-Key run at most once per user."""
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = (request.headers.get(HEADER) or "").strip()
+        uid = session.get("user_id")
+        if not key or not uid:
+            return view(*args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return jsonify({"error": f"{HEADER} must be at most {MAX_KEY_LENGTH} characters"}), 400
+
+        db = get_db()
+        # Scoped per user and endpoint, so one key can't leak another user's response
+        doc_id = f"{uid}:{request.endpoint}:{key}"
+        lease = timedelta(seconds=current_app.config.get("IDEMPOTENCY_LEASE_SECONDS", 120))
+        token, resp = _claim(db, doc_id, request_fingerprint(), datetime.utcnow(), lease)
+        if resp is not None:
+            return resp
+        mine = {"_id": doc_id, "owner": token}
+
+        try:
+            resp = current_app.make_response(view(*args, **kwargs))
+        except Exception:
+            db[COLLECTION].delete_one(mine)
+            raise
+
+        if resp.status_code >= 500:
+            db[COLLECTION].delete_one(mine)
+            return resp
+        db[COLLECTION].update_one(
+            mine,
+            {"$set": {"state": "done", "status": resp.status_code, "mimetype": resp.mimetype, "body": resp.get_data()},
+             "$unset": {"lease_until": ""}},
+        )
+        return resp
+
+    return wrapper
+
@@ -0,0 +1,294 @@
+# app/insights.py
+"""
+Per-user spending insights, computed offline by `python -m scripts.compute_insights`
+and stored as one compact document per user in `insights` (read by /api/insights
+through app.models.get_insights).
+
+A user's expenses from the last `days` days are streamed in chunks (live rows
+through a batched cursor, archived months straight from their bucket columns)
+into fixed-size NumPy accumulators:
+  - daily[d, c]: amount spent on day d in category c
+  - per category count / sum / sum of squares of log(amount), for z-scores
+  - rows from the last ANOMALY_DAYS days, the candidates for anomaly flags
+so memory depends on the window and category count, not on how many rows a user has.
+
+From those:
+  - months: totals per category for the last TREND_MONTHS calendar months
+  - trends: month-to-date vs the same days of last month, per category
+  - anomalies: recent expenses whose log(amount) is >= ANOMALY_Z standard
+    deviations above that category's mean (amounts are roughly log-normal)
+  - goals: when each open goal will be reached at its average saving rate so far
+"""
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from app.models import BUCKETS
+
+DEFAULT_DAYS = 400  # current month plus a full year back
+CHUNK_ROWS = 5000
+TREND_MONTHS = 6
+ANOMALY_DAYS = 30
+ANOMALY_Z = 3.0
+ANOMALY_MIN_SAMPLES = 10
+MAX_ANOMALIES = 10
+MAX_PROJECTION_DAYS = 365 * 50
+
+_FIELDS = {"timestamp": 1, "category": 1, "amount": 1, "description": 1}
+
+
+def _category(name):
+    return "Others" if name in (None, "", "Unknown") else name
+
+
+def _live_chunks(db, uid, since, chunk):
+    cursor = db.expenses.find({"user_id": uid, "timestamp": {"$gte": since}}, _FIELDS).batch_size(chunk)
+    rows = []
+    for doc in cursor:
+        rows.append(doc)
+        if len(rows) >= chunk:
+            yield _columns(rows)
+            rows = []
+    if rows:
+        yield _columns(rows)
+
+
+def _columns(rows):
+    return (
+        [r["_id"] for r in rows],
+        [r.get("timestamp") for r in rows],
+        [r.get("category") for r in rows],
+        [r.get("amount") for r in rows],
+        [r.get("description") for r in rows],
+    )
+
+
+def _bucket_chunks(db, uid, since):
+    # Buckets are already columnar: one chunk per archived month
+    fields = {"ids": 1, "timestamps": 1, "categories": 1, "amounts": 1, "descriptions": 1}
+    for b in db[BUCKETS].find({"user_id": uid, "end": {"$gte": since}}, fields):
+        ids = b.get("ids") or []
+        n = len(ids)
+        yield (
+            ids,
+            (b.get("timestamps") or [None] * n)[:n],
+            (b.get("categories") or [None] * n)[:n],
+            (b.get("amounts") or [None] * n)[:n],
+            (b.get("descriptions") or [None] * n)[:n],
+        )
+
+
+class _Accumulator:
+    def __init__(self, start, days, recent_start):
+        self.start = np.datetime64(start, "ms")
+        self.days = days
+        self.recent_start = np.datetime64(recent_start, "ms")
+        self.categories = {}
+        self.daily = np.zeros((days, 0))
+        self.count = np.zeros(0)
+        self.log_sum = np.zeros(0)
+        self.log_sumsq = np.zeros(0)
+        self.recent = []
+        self.rows = 0
+
+    def _indexes(self, names):
+        uniq, inverse = np.unique(np.array([_category(c) for c in names], dtype=object), return_inverse=True)
+        for name in uniq:
+            if name not in self.categories:
+                self.categories[name] = len(self.categories)
+        grow = len(self.categories) - self.daily.shape[1]
+        if grow:
+            self.daily = np.pad(self.daily, ((0, 0), (0, grow)))
+            self.count = np.pad(self.count, (0, grow))
+            self.log_sum = np.pad(self.log_sum, (0, grow))
+            self.log_sumsq = np.pad(self.log_sumsq, (0, grow))
+        lookup = np.array([self.categories[name] for name in uniq], dtype=np.intp)
+        return lookup[inverse]
+
+    def add(self, ids, timestamps, categories, amounts, descriptions):
+        if not ids:
+            return
+        ts = np.array(timestamps, dtype="datetime64[ms]")
+        amt = np.fromiter((float(a or 0.0) for a in amounts), dtype=np.float64, count=len(amounts))
+        cat = self._indexes(categories)
+        day = (ts - self.start) // np.timedelta64(1, "D")
+        keep = ~np.isnat(ts) & (day >= 0) & (day < self.days)
+        if not keep.all():
+            ts, amt, cat, day = ts[keep], amt[keep], cat[keep], day[keep]
+        self.rows += len(amt)
+
+        ncat = len(self.categories)
+        flat = day.astype(np.intp) * ncat + cat
+        self.daily += np.bincount(flat, weights=amt, minlength=self.days * ncat).reshape(self.days, ncat)
+
+        pos = amt > 0
+        logs = np.log(amt[pos])
+        self.count += np.bincount(cat[pos], minlength=ncat)
+        self.log_sum += np.bincount(cat[pos], weights=logs, minlength=ncat)
+        self.log_sumsq += np.bincount(cat[pos], weights=logs * logs, minlength=ncat)
+
+        recent = pos & (ts >= self.recent_start)
+        if recent.any():
+            idx = np.flatnonzero(keep)[recent]
+            self.recent.append((
+                ts[recent], amt[recent], cat[recent],
+                [ids[i] for i in idx], [descriptions[i] for i in idx],
+            ))
+
+
+def _month_floor(dt):
+    return datetime(dt.year, dt.month, 1)
+
+
+def _months_back(dt, n):
+    y, m = dt.year, dt.month - n
+    while m < 1:
+        y, m = y - 1, m + 12
+    return datetime(y, m, 1)
+
+
+def _by_category(names, totals):
+    order = np.argsort(-totals)
+    return [{"category": names[i], "total": round(float(totals[i]), 2)} for i in order if totals[i] > 0]
+
+
+def _months(acc, names, now):
+    day_months = (acc.start.astype("datetime64[D]") + np.arange(acc.days)).astype("datetime64[M]")
+    out = []
+    for k in range(TREND_MONTHS - 1, -1, -1):
+        month = _months_back(now, k)
+        totals = acc.daily[day_months == np.datetime64(month, "M")].sum(axis=0)
+        out.append({
+            "month": month.strftime("%Y-%m"),
+            "total": round(float(totals.sum()), 2),
+            "by_category": _by_category(names, totals),
+        })
+    return out
+
+
+def _period(acc, first, last):
+    """Per-category totals for days [first, last)."""
+    lo = int((np.datetime64(first, "D") - acc.start.astype("datetime64[D]")) // np.timedelta64(1, "D"))
+    hi = int((np.datetime64(last, "D") - acc.start.astype("datetime64[D]")) // np.timedelta64(1, "D"))
+    return acc.daily[max(lo, 0):max(hi, 0)].sum(axis=0)
+
+
+def _trends(acc, names, now):
+    # Month-to-date against the same number of days of last month, so a partial
+    # month isn't compared with a full one
+    this_start = _month_floor(now)
+    last_start = _months_back(now, 1)
+    elapsed = (now - this_start).days + 1
+    last_end = min(last_start + timedelta(days=elapsed), this_start)
+    cur = _period(acc, this_start, this_start + timedelta(days=elapsed))
+    prev = _period(acc, last_start, last_end)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        change = np.where(prev > 0, (cur - prev) / prev * 100.0, np.nan)
+
+    categories = []
+    for i in np.argsort(-cur, kind="stable"):
+        if cur[i] == 0 and prev[i] == 0:
+            continue
+        categories.append({
+            "category": names[i],
+            "this_month": round(float(cur[i]), 2),
+            "last_month": round(float(prev[i]), 2),
+            "change_pct": None if np.isnan(change[i]) else round(float(change[i]), 1),
+        })
+    total_cur, total_prev = float(cur.sum()), float(prev.sum())
+    return {
+        "days": elapsed,
+        "this_month": round(total_cur, 2),
+        "last_month": round(total_prev, 2),
+        "change_pct": round((total_cur - total_prev) / total_prev * 100.0, 1) if total_prev > 0 else None,
+        "categories": categories,
+    }
+
+
+def _anomalies(acc, names):
+    if not acc.recent:
+        return []
+    ts = np.concatenate([r[0] for r in acc.recent])
+    amt = np.concatenate([r[1] for r in acc.recent])
+    cat = np.concatenate([r[2] for r in acc.recent])
+    ids = [i for r in acc.recent for i in r[3]]
+    descriptions = [d for r in acc.recent for d in r[4]]
+
+    count = np.maximum(acc.count, 1)
+    mean = acc.log_sum / count
+    std = np.sqrt(np.maximum(acc.log_sumsq / count - mean * mean, 0.0))
+    usable = (acc.count[cat] >= ANOMALY_MIN_SAMPLES) & (std[cat] > 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = np.where(usable, (np.log(amt) - mean[cat]) / std[cat], 0.0)
+
+    flagged = np.flatnonzero(z >= ANOMALY_Z)
+    flagged = flagged[np.argsort(-z[flagged])][:MAX_ANOMALIES]
+    return [
+        {
+            "expense_id": ids[i],
+            "timestamp": ts[i].astype(datetime),
+            "category": names[cat[i]],
+            "amount": round(float(amt[i]), 2),
+            "description": descriptions[i],
+            "z": round(float(z[i]), 2),
+            "typical": round(float(np.exp(mean[cat[i]])), 2),  # geometric mean for the category
+        }
+        for i in flagged
+    ]
+
+
+def project_goals(goals, now):
+    """Projected completion per goal, from its average saving rate since creation."""
+    if not goals:
+        return []
+    target = np.array([float(g.get("target_amount") or 0.0) for g in goals])
+    saved = np.array([float(g.get("saved_amount") or 0.0) for g in goals])
+    age_days = np.array([
+        max((now - (g.get("created_at") or now)).total_seconds() / 86400.0, 1.0) for g in goals
+    ])
+    rate = saved / age_days
+    remaining = np.maximum(target - saved, 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        eta = np.where(remaining <= 0, 0.0, np.where(rate > 0, remaining / rate, np.inf))
+        progress = np.where(target > 0, np.minimum(saved / target, 1.0) * 100.0, 0.0)
+
+    out = []
+    for i, g in enumerate(goals):
+        reachable = np.isfinite(eta[i]) and eta[i] <= MAX_PROJECTION_DAYS
+        out.append({
+            "goal_id": g["_id"],
+            "goal_name": g.get("goal_name") or g.get("name"),
+            "target_amount": round(float(target[i]), 2),
+            "saved_amount": round(float(saved[i]), 2),
+            "progress_pct": round(float(progress[i]), 1),
+            "daily_rate": round(float(rate[i]), 2),
+            "days_left": int(np.ceil(eta[i])) if reachable else None,
+            "projected_date": now + timedelta(days=float(eta[i])) if reachable else None,
+        })
+    return out
+
+
+def compute_user_insights(db, uid, goals, now=None, days=DEFAULT_DAYS, chunk=CHUNK_ROWS, buckets=False):
+    """Build the `insights` document for one user (the `_id` is the user id)."""
+    now = now or datetime.utcnow()
+    start = datetime(now.year, now.month, now.day) - timedelta(days=days - 1)
+    acc = _Accumulator(start, days, now - timedelta(days=ANOMALY_DAYS))
+    for cols in _live_chunks(db, uid, start, chunk):
+        acc.add(*cols)
+    if buckets:
+        for cols in _bucket_chunks(db, uid, start):
+            acc.add(*cols)
+
+    names = [None] * len(acc.categories)
+    for name, i in acc.categories.items():
+        names[i] = name
+    return {
+        "_id": uid,
+        "computed_at": now,
+        "window_days": days,
+        "rows": acc.rows,
+        "months": _months(acc, names, now),
+        "trends": _trends(acc, names, now),
+        "anomalies": _anomalies(acc, names),
+        "goals": project_goals(goals, now),
+    }
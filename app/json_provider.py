@@ -0,0 +1,61 @@
+# app/json_provider.py
+"""
+Flask JSON provider that serializes Mongo documents directly.
+
+ObjectId -> str, datetime -> ISO 8601 (same as the old `.isoformat()` calls),
+Decimal / Decimal128 -> float. Uses orjson when installed (pip install orjson),
+otherwise the stdlib encoder with the same conversions.
+"""
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from bson import ObjectId
+from bson.decimal128 import Decimal128
+from flask.json.provider import JSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional speedup
+    orjson = None
+
+
+def _default(o):
+    if isinstance(o, ObjectId):
+        return str(o)
+    if isinstance(o, (datetime, date)):
+        # orjson encodes these natively; only the stdlib path gets here
+        return o.isoformat()
+    if isinstance(o, Decimal128):
+        return float(o.to_decimal())
+    if isinstance(o, Decimal):
+        return float(o)
+    if isinstance(o, (set, frozenset)):
+        return list(o)
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+if orjson is not None:
+    def _dumps_bytes(obj):
+        # str/int subclasses (bson.Int64, ...) are encoded as their base type, like the stdlib path
+        return orjson.dumps(obj, default=_default)
+
+    _loads = orjson.loads
+else:
+    def _dumps_bytes(obj):
+        return json.dumps(obj, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    _loads = json.loads
+
+
+class MongoJSONProvider(JSONProvider):
+    def dumps(self, obj, **kwargs):
+        return _dumps_bytes(obj).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        return _loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        # Hand bytes straight to the response; skips a decode/encode round trip
+        return self._app.response_class(_dumps_bytes(obj), mimetype="application/json")
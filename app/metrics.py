@@ -0,0 +1,371 @@
+# app/metrics.py
+"""
+Lightweight request instrumentation exposed on /metrics (Prometheus text format).
+
+- Every request is timed per endpoint.
+- Code wrapped in `with stage("name"):` is timed per endpoint + stage.
+- MongoDB commands are counted (and timed as the "db" stage) through a
+  pymongo command listener, so routes need no changes to report DB work.
+- Requests slower than SLOW_REQUEST_MS are logged with their stage breakdown.
+- Each worker reports its own memory (RSS split into anonymous vs file-backed,
+  plus PSS) and how long it spent loading ASR models.
+
+Observing a sample is a bisect plus a locked increment, cheap enough to leave on.
+
+Series live in the worker that observed them. With several gunicorn workers, set
+METRICS_MULTIPROC_DIR (see the aggregation section below) so a scrape reports
+every worker rather than whichever one answered.
+"""
+import json
+import logging
+import os
+import resource
+import sys
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from flask import Blueprint, Response, current_app, g, has_request_context, request
+from pymongo import monitoring
+
+log = logging.getLogger(__name__)
+
+metrics_bp = Blueprint("metrics", __name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+BYTE_BUCKETS = (1e3, 1e4, 3e4, 1e5, 3e5, 1e6, 3e6, 1e7)
+
+
+def _escape(v):
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Histogram:
+    def __init__(self, name, help_text, labelnames, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            s = self._series.get(labels)
+            if s is None:
+                s = self._series[labels] = [0] * (len(self.buckets) + 2)
+            if i < len(self.buckets):
+                s[i] += 1
+            s[-2] += value
+            s[-1] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {k: list(v) for k, v in self._series.items()}
+
+    @staticmethod
+    def merge(series, labels, value, alive):
+        s = series.get(labels)
+        series[labels] = list(value) if s is None else [a + b for a, b in zip(s, value)]
+
+    def render(self, series=None):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        if series is None:
+            series = self.snapshot()
+        for labels, s in sorted(series.items()):
+            cumulative = 0
+            for le, n in zip(self.buckets, s):
+                cumulative += n
+                bucket = _labels(self.labelnames, labels, 'le="%s"' % le)
+                lines.append(f"{self.name}_bucket{bucket} {cumulative}")
+            bucket = _labels(self.labelnames, labels, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{bucket} {s[-1]}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {s[-2]}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {s[-1]}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help_text, labelnames):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels, amount=1):
+        with self._lock:
+            self._series[labels] = self._series.get(labels, 0) + amount
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._series)
+
+    @staticmethod
+    def merge(series, labels, value, alive):
+        # Exited workers still count: totals must never go backwards
+        series[labels] = series.get(labels, 0) + value
+
+    def render(self, series=None):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        if series is None:
+            series = self.snapshot()
+        for labels, v in sorted(series.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {v}")
+        return lines
+
+
+class Gauge:
+    """Current values; `collect`, if given, is called at scrape time and returns {labels: value}."""
+
+    def __init__(self, name, help_text, labelnames, collect=None):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._collect = collect
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def set(self, labels, value):
+        with self._lock:
+            self._series[labels] = value
+
+    def snapshot(self):
+        with self._lock:
+            series = dict(self._series)
+        if self._collect:
+            series.update(self._collect())
+        return series
+
+    @staticmethod
+    def merge(series, labels, value, alive):
+        # Gauges carry a pid label; only workers still running report one
+        if alive:
+            series[labels] = value
+
+    def render(self, series=None):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        if series is None:
+            series = self.snapshot()
+        for labels, v in sorted(series.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {v}")
+        return lines
+
+
+_STATUS_FIELDS = {"VmRSS": "rss", "RssAnon": "rss_anon", "RssFile": "rss_file", "RssShmem": "rss_shmem"}
+
+
+def process_memory():
+    """
+    This process's memory in bytes by kind. Memory-mapped model weights count as
+    rss_file and are shared by every worker mapping the same file; pss divides
+    shared pages between the processes using them, so summing pss over workers
+    gives the real footprint.
+    """
+    out = {}
+    try:
+        with open("/proc/self/status") as fh:
+            for line in fh:
+                key, _, rest = line.partition(":")
+                if key in _STATUS_FIELDS:
+                    out[_STATUS_FIELDS[key]] = int(rest.split()[0]) * 1024
+        with open("/proc/self/smaps_rollup") as fh:
+            for line in fh:
+                if line.startswith("Pss:"):
+                    out["pss"] = int(line.split()[1]) * 1024
+                    break
+    except OSError:
+        pass  # no /proc (macOS) or no smaps_rollup (old kernels)
+    if "rss" not in out:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        out["rss_peak"] = peak if sys.platform == "darwin" else peak * 1024
+    return out
+
+
+def _memory_series():
+    pid = str(os.getpid())
+    return {(pid, kind): value for kind, value in process_memory().items()}
+
+
+REQUESTS = Counter("http_requests_total", "HTTP requests by endpoint, method and status.", ["endpoint", "method", "status"])
+REQUEST_LATENCY = Histogram("http_request_duration_seconds", "Request latency by endpoint.", ["endpoint", "method"])
+STAGE_LATENCY = Histogram("http_request_stage_duration_seconds", "Time spent per request stage.", ["endpoint", "stage"])
+REQUEST_DB_OPS = Histogram("http_request_db_operations", "MongoDB commands issued per request.", ["endpoint"], COUNT_BUCKETS)
+REQUEST_BYTES = Histogram("http_request_body_bytes", "Request body size (uploads) by endpoint.", ["endpoint"], BYTE_BUCKETS)
+ASR_DECISIONS = Counter("asr_hybrid_decisions_total", "Hybrid ASR: which transcript was used.", ["endpoint", "source"])
+MONGO_COMMANDS = Counter("mongo_commands_total", "MongoDB commands by name.", ["command"])
+PROCESS_MEMORY = Gauge("process_memory_bytes", "Memory of this worker by kind (rss, rss_anon, rss_file, pss).", ["pid", "kind"], _memory_series)
+ASR_MODEL_LOAD = Gauge("asr_model_load_seconds", "Time spent loading each ASR model, by loading process.", ["pid", "backend", "source"])
+
+REGISTRY = [
+    REQUESTS, REQUEST_LATENCY, STAGE_LATENCY, REQUEST_DB_OPS, REQUEST_BYTES, ASR_DECISIONS, MONGO_COMMANDS,
+    PROCESS_MEMORY, ASR_MODEL_LOAD,
+]
+
+
+def _endpoint():
+    return request.endpoint or "unmatched"
+
+
+@contextmanager
+def stage(name):
+    """Time a block as stage `name` of the current request (no-op outside a request)."""
+    if not has_request_context() or "metrics_stages" not in g:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        dt = time.perf_counter() - t0
+        g.metrics_stages[name] = g.metrics_stages.get(name, 0.0) + dt
+        STAGE_LATENCY.observe((_endpoint(), name), dt)
+
+
+class _MongoListener(monitoring.CommandListener):
+    """Attributes every command to the request running on the calling thread."""
+
+    def started(self, event):
+        MONGO_COMMANDS.inc((event.command_name,))
+        if has_request_context() and "metrics_stages" in g:
+            g.metrics_db_ops += 1
+
+    def _finished(self, event):
+        if has_request_context() and "metrics_stages" in g:
+            g.metrics_stages["db"] = g.metrics_stages.get("db", 0.0) + event.duration_micros / 1e6
+
+    succeeded = _finished
+    failed = _finished
+
+
+def _before_request():
+    dirname = current_app.config.get("METRICS_MULTIPROC_DIR")
+    if dirname:
+        _ensure_flusher(dirname, current_app.config.get("METRICS_FLUSH_SECONDS", 5.0))
+    g.metrics_start = time.perf_counter()
+    g.metrics_stages = {}
+    g.metrics_db_ops = 0
+
+
+def _after_request(response):
+    if "metrics_start" not in g:
+        return response
+    elapsed = time.perf_counter() - g.metrics_start
+    endpoint = _endpoint()
+    REQUESTS.inc((endpoint, request.method, str(response.status_code)))
+    REQUEST_LATENCY.observe((endpoint, request.method), elapsed)
+    REQUEST_DB_OPS.observe((endpoint,), g.metrics_db_ops)
+    if request.content_length:
+        REQUEST_BYTES.observe((endpoint,), request.content_length)
+    if "db" in g.metrics_stages:
+        STAGE_LATENCY.observe((endpoint, "db"), g.metrics_stages["db"])
+
+    slow_ms = current_app.config.get("SLOW_REQUEST_MS") or 0
+    if slow_ms and elapsed * 1000 >= slow_ms:
+        breakdown = " ".join(f"{k}={v * 1000:.1f}ms" for k, v in sorted(g.metrics_stages.items()))
+        log.warning(
+            "slow request %s %s %s %.1fms db_ops=%d %s",
+            request.method, request.path, response.status_code, elapsed * 1000, g.metrics_db_ops, breakdown,
+        )
+    return response
+
+
+# ---------- Multi-worker aggregation ----------
+# Each gunicorn worker has its own registry and a scrape reaches only one of them.
+# With METRICS_MULTIPROC_DIR set, every worker writes its series to <dir>/<pid>.json
+# every METRICS_FLUSH_SECONDS (and right before serving a scrape), and /metrics
+# merges all files: counters and histograms are summed over every worker that ever
+# wrote one, gauges come from live workers only. Empty the directory before the
+# server starts, or totals carry over from the previous run.
+
+_flusher_pid = None
+
+
+def _flush(dirname):
+    data = {m.name: [[list(k), v] for k, v in m.snapshot().items()] for m in REGISTRY}
+    path = os.path.join(dirname, f"{os.getpid()}.json")
+    with open(path + ".tmp", "w") as fh:
+        json.dump(data, fh)
+    os.replace(path + ".tmp", path)  # readers never see a half-written file
+
+
+def _flush_loop(dirname, interval):
+    while True:
+        time.sleep(interval)
+        try:
+            _flush(dirname)
+        except OSError as e:
+            log.warning("could not write metrics to %s: %s", dirname, e)
+
+
+def _ensure_flusher(dirname, interval):
+    # Threads don't survive fork, so each worker starts its own on its first request
+    global _flusher_pid
+    if _flusher_pid != os.getpid():
+        _flusher_pid = os.getpid()
+        threading.Thread(target=_flush_loop, args=(dirname, interval), daemon=True, name="metrics-flush").start()
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _merged_series(dirname):
+    _flush(dirname)
+    merged = {m.name: {} for m in REGISTRY}
+    for entry in os.scandir(dirname):
+        name, ext = os.path.splitext(entry.name)
+        if ext != ".json" or not name.isdigit():
+            continue
+        try:
+            with open(entry.path) as fh:
+                data = json.load(fh)
+        except (OSError, ValueError):
+            continue
+        alive = _alive(int(name))
+        for m in REGISTRY:
+            for labels, value in data.get(m.name, ()):
+                m.merge(merged[m.name], tuple(labels), value, alive)
+    return merged
+
+
+@metrics_bp.route("/metrics", methods=["GET"])
+def metrics():
+    dirname = current_app.config.get("METRICS_MULTIPROC_DIR")
+    merged = _merged_series(dirname) if dirname else {}
+    lines = []
+    for m in REGISTRY:
+        lines.extend(m.render(merged.get(m.name)))
+    return Response("\n".join(lines) + "\n", mimetype="text/plain; version=0.0.4")
+
+
+_listener_registered = False
+
+
+def init_metrics(app):
+    global _listener_registered
+    if not app.config.get("METRICS_ENABLED", True):
+        return
+    if not _listener_registered:
+        # Global registration applies to every MongoClient created afterwards (get_db makes one per call)
+        monitoring.register(_MongoListener())
+        _listener_registered = True
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.register_blueprint(metrics_bp)
@@ -2,23 +2,52 @@
 from pymongo import MongoClient
 from flask import current_app
 from bson.objectid import ObjectId
+from itertools import groupby
 import os
+import re
 
 def get_db():
     client = MongoClient(current_app.config['MONGO_URI'])
     db = client.get_default_database()
     return db
 
+# Stored on expenses for search, never returned by the API
+HIDDEN_FIELDS = ("search_tokens",)
+
+def _without_hidden():
+    return {field: 0 for field in HIDDEN_FIELDS}
+
 # helper functions
 def create_expense(user_id, expense_doc):
     db = get_db()
     expense_doc['user_id'] = ObjectId(user_id)
+    expense_doc['search_tokens'] = search_tokens(expense_doc.get('description'))
     db.expenses.insert_one(expense_doc)
+    expense_doc.pop('search_tokens')  # index data, not part of the API shape
     return expense_doc
 
+def create_expenses(user_id, expense_docs):
+    # insert_many: every item of a multi-expense utterance in one round trip
+    db = get_db()
+    uid = ObjectId(user_id)
+    for doc in expense_docs:
+        doc['user_id'] = uid
+        doc['search_tokens'] = search_tokens(doc.get('description'))
+    db.expenses.insert_many(expense_docs)
+    for doc in expense_docs:
+        doc.pop('search_tokens')
+    return expense_docs
+
 def list_expenses(user_id, limit=100):
     db = get_db()
-    return list(db.expenses.find({"user_id": ObjectId(user_id)}).sort("timestamp", -1).limit(limit))
+    uid = ObjectId(user_id)
+    docs = list(db.expenses.find({"user_id": uid}, _without_hidden()).sort("timestamp", -1).limit(limit))
+    if current_app.config.get("EXPENSE_BUCKETS"):
+        # Live and bucketed rows may interleave, so take the newest `limit` of each and merge
+        docs.extend(_bucketed_expenses(db, uid, limit))
+        docs.sort(key=lambda d: d["timestamp"], reverse=True)
+        docs = docs[:limit]
+    return docs
 
 def create_or_update_goal(user_id, name, amount):
     db = get_db()
@@ -43,3 +72,299 @@ def create_or_update_goal(user_id, name, amount):
 def list_goals(user_id):
     db = get_db()
     return list(db.goals.find({"user_id": ObjectId(user_id)}))
+
+
+# ---------- Bucketed (archived) expenses ----------
+# Closed months are compacted into one document per user per month in
+# `expense_buckets`, holding parallel arrays instead of one document per expense:
+#   {user_id, month: "2024-05", start, end, count, total,
+#    ids: [...], amounts: [...], categories: [...], payment_methods: [...],
+#    descriptions: [...], timestamps: [...], metas: [...],
+#    search_tokens: [[...], ...], search_token_set: [...]}
+# Row i of a bucket is the expense whose fields are the i-th element of each array.
+# search_token_set is the union of the rows' search_tokens, indexed so a search
+# only unwinds buckets that contain every query word somewhere.
+BUCKETS = "expense_buckets"
+BUCKET_TOKEN_SET = "search_token_set"
+
+BUCKET_COLUMNS = {
+    "_id": "ids",
+    "amount": "amounts",
+    "category": "categories",
+    "payment_method": "payment_methods",
+    "description": "descriptions",
+    "timestamp": "timestamps",
+    "meta": "metas",
+    "search_tokens": "search_tokens",
+}
+
+
+def ensure_bucket_indexes(db=None):
+    db = db if db is not None else get_db()
+    db[BUCKETS].create_index([("user_id", 1), ("month", 1)], unique=True)
+    db[BUCKETS].create_index([("user_id", 1), ("start", -1)])
+
+
+def _bucket_rows(bucket, hidden=False):
+    """
+    Expand a bucket document back into expense-shaped dicts (oldest first).
+    With hidden=True, fields in HIDDEN_FIELDS are left out (for API responses).
+    """
+    columns = [
+        (field, bucket.get(col) or []) for field, col in BUCKET_COLUMNS.items()
+        if not (hidden and field in HIDDEN_FIELDS)
+    ]
+    rows = []
+    for i in range(len(bucket.get("ids") or [])):
+        row = {"user_id": bucket["user_id"]}
+        for field, values in columns:
+            value = values[i] if i < len(values) else None
+            if value is not None:
+                row[field] = value
+        rows.append(row)
+    return rows
+
+
+def _bucketed_expenses(db, uid, limit):
+    """Newest `limit` archived expenses for a user, newest first."""
+    rows = []
+    for bucket in db[BUCKETS].find({"user_id": uid}).sort("start", -1):
+        rows.extend(reversed(_bucket_rows(bucket, hidden=True)))
+        if len(rows) >= limit:
+            break
+    return rows[:limit]
+
+
+def _write_bucket(db, uid, month, rows):
+    rows = sorted(rows, key=lambda r: r["timestamp"])
+    q = {"user_id": uid, "month": month}
+    if not rows:
+        db[BUCKETS].delete_one(q)
+        return
+    doc = {
+        "user_id": uid,
+        "month": month,
+        "start": rows[0]["timestamp"],
+        "end": rows[-1]["timestamp"],
+        "count": len(rows),
+        "total": float(sum(float(r.get("amount") or 0.0) for r in rows)),
+    }
+    for field, col in BUCKET_COLUMNS.items():
+        doc[col] = [r.get(field) for r in rows]
+    # Rows compacted from before search existed are tokenized on the way in
+    doc["search_tokens"] = [
+        tokens if tokens is not None else search_tokens(r.get("description"))
+        for tokens, r in zip(doc["search_tokens"], rows)
+    ]
+    doc[BUCKET_TOKEN_SET] = bucket_token_set(doc["search_tokens"])
+    db[BUCKETS].replace_one(q, doc, upsert=True)
+
+
+def bucket_token_set(column):
+    """Union of a bucket's per-row search_tokens column."""
+    return sorted({t for tokens in column for t in tokens or ()})
+
+
+def compact_expenses(user_id, before):
+    """
+    Move a user's live expenses with timestamp < `before` into monthly buckets.
+    Safe to re-run: rows already present in a bucket (by _id) are not duplicated.
+    Returns the number of live expenses removed.
+    """
+    db = get_db()
+    uid = ObjectId(user_id)
+    cursor = db.expenses.find({"user_id": uid, "timestamp": {"$lt": before}}).sort("timestamp", 1)
+    moved = 0
+    for month, docs in groupby(cursor, key=lambda d: d["timestamp"].strftime("%Y-%m")):
+        docs = list(docs)
+        existing = db[BUCKETS].find_one({"user_id": uid, "month": month})
+        rows = _bucket_rows(existing) if existing else []
+        seen = {r["_id"] for r in rows}
+        rows.extend(d for d in docs if d["_id"] not in seen)
+        # Bucket first, then delete: a crash in between leaves duplicates that the next run skips
+        _write_bucket(db, uid, month, rows)
+        db.expenses.delete_many({"_id": {"$in": [d["_id"] for d in docs]}})
+        moved += len(docs)
+    return moved
+
+
+def delete_bucketed_expense(user_id, expense_id):
+    db = get_db()
+    uid = ObjectId(user_id)
+    bucket = db[BUCKETS].find_one({"user_id": uid, "ids": expense_id})
+    if not bucket:
+        return False
+    rows = [r for r in _bucket_rows(bucket) if r["_id"] != expense_id]
+    _write_bucket(db, uid, bucket["month"], rows)
+    return True
+
+
+def _bucket_match(match):
+    """Translate an expense $match into a coarse filter over bucket documents."""
+    q = {}
+    for field, cond in match.items():
+        if field == "user_id":
+            q["user_id"] = cond
+        elif field == "timestamp" and isinstance(cond, dict):
+            for op in ("$gte", "$gt"):
+                if op in cond:
+                    q["end"] = {op: cond[op]}
+            for op in ("$lte", "$lt"):
+                if op in cond:
+                    q["start"] = {op: cond[op]}
+        elif field in ("category", "payment_method") and not isinstance(cond, dict):
+            # Array equality matches buckets that contain the value at least once
+            q[BUCKET_COLUMNS[field]] = cond
+        elif field == "search_tokens":
+            # Buckets written before the token set existed are unwound until backfilled
+            q["$or"] = [{BUCKET_TOKEN_SET: cond}, {BUCKET_TOKEN_SET: {"$exists": False}}]
+    return q
+
+
+def _bucket_unwind_stages(match, after=None):
+    # After unwinding, `ids` holds the row's _id and `i` its index into the other columns
+    project = {"user_id": 1, "_id": "$ids"}
+    for field, col in BUCKET_COLUMNS.items():
+        if field != "_id":
+            project[field] = {"$arrayElemAt": [f"${col}", "$i"]}
+    buckets = _bucket_match(match)
+    if after:
+        # Skip buckets that start after the cursor before unwinding them
+        buckets = {"$and": [buckets, {"start": {"$lte": after[0]}}]}
+    stages = [
+        {"$match": buckets},
+        {"$unwind": {"path": "$ids", "includeArrayIndex": "i"}},
+        {"$project": project},
+        {"$match": match},
+    ]
+    if after:
+        stages.append({"$match": _after({}, after)})
+    return stages
+
+
+def aggregate_expenses(match, stages=(), db=None):
+    """
+    Run `[{$match: match}, *stages]` over live expenses and, when bucketed
+    storage is enabled, over archived rows unwound from `expense_buckets`.
+    """
+    db = db if db is not None else get_db()
+    pipeline = [{"$match": match}]
+    if current_app.config.get("EXPENSE_BUCKETS"):
+        pipeline.append({"$unionWith": {"coll": BUCKETS, "pipeline": _bucket_unwind_stages(match)}})
+    pipeline.extend(stages)
+    return list(db.expenses.aggregate(pipeline))
+
+
+# ---------- Search ----------
+# Every expense carries `search_tokens`: the lower-cased words of its description
+# plus each word's prefixes (2..SEARCH_PREFIX_MAX chars). A query word then becomes
+# a single equality lookup on the multikey index
+#   {user_id: 1, search_tokens: 1, timestamp: -1, _id: -1}
+# so "ub" finds "Uber ride" without a regex or collection scan, and results come
+# back already in (timestamp, _id) order for keyset paging.
+# Archived buckets are narrowed the same way through their search_token_set.
+# The indexes are created, and rows written before this existed backfilled, by
+# `python -m scripts.search_index`; run it on every deploy (safe to re-run), since
+# without the indexes a search scans every expense the user has.
+SEARCH_TOKEN_RE = re.compile(r"[a-z0-9]+")
+SEARCH_PREFIX_MIN = 2
+SEARCH_PREFIX_MAX = 15
+
+SEARCH_SORT = [("timestamp", -1), ("_id", -1)]
+
+
+def search_tokens(text):
+    tokens = set()
+    for word in SEARCH_TOKEN_RE.findall((text or "").lower()):
+        tokens.add(word)
+        for n in range(SEARCH_PREFIX_MIN, min(len(word), SEARCH_PREFIX_MAX) + 1):
+            tokens.add(word[:n])
+    return sorted(tokens)
+
+
+def _query_tokens(q):
+    # Longer words are only indexed up to SEARCH_PREFIX_MAX chars (plus the whole word)
+    return sorted({w[:SEARCH_PREFIX_MAX] for w in SEARCH_TOKEN_RE.findall((q or "").lower())})
+
+
+def ensure_search_indexes(db=None):
+    db = db if db is not None else get_db()
+    db.expenses.create_index([("user_id", 1), ("search_tokens", 1), ("timestamp", -1), ("_id", -1)])
+    db.expenses.create_index([("user_id", 1), ("category", 1), ("timestamp", -1), ("_id", -1)])
+    db.expenses.create_index([("user_id", 1), ("timestamp", -1), ("_id", -1)])
+    db[BUCKETS].create_index([("user_id", 1), (BUCKET_TOKEN_SET, 1), ("start", -1)])
+
+
+def search_match(user_id, q=None, category=None, start=None, end=None, min_amount=None, max_amount=None):
+    """Build the expense filter for a search; `end` is exclusive."""
+    match = {"user_id": ObjectId(user_id)}
+    tokens = _query_tokens(q)
+    if tokens:
+        match["search_tokens"] = tokens[0] if len(tokens) == 1 else {"$all": tokens}
+    if category:
+        match["category"] = category
+    if start or end:
+        match["timestamp"] = {}
+        if start:
+            match["timestamp"]["$gte"] = start
+        if end:
+            match["timestamp"]["$lt"] = end
+    if min_amount is not None or max_amount is not None:
+        match["amount"] = {}
+        if min_amount is not None:
+            match["amount"]["$gte"] = min_amount
+        if max_amount is not None:
+            match["amount"]["$lte"] = max_amount
+    return match
+
+
+def _after(match, after):
+    # Keyset condition for "older than (timestamp, _id)". The plain $lte gives the
+    # index a range bound; the $or breaks ties between rows with equal timestamps.
+    ts, oid = after
+    return {"$and": [
+        match,
+        {"timestamp": {"$lte": ts}},
+        {"$or": [{"timestamp": {"$lt": ts}}, {"_id": {"$lt": oid}}]},
+    ]}
+
+
+def search_expenses(match, limit=50, after=None):
+    """
+    One page of expenses matching `match`, newest first.
+    `after` is the (timestamp, _id) of the last row of the previous page.
+    Returns (rows, has_more).
+    """
+    db = get_db()
+    q = _after(match, after) if after else match
+    rows = list(db.expenses.find(q, _without_hidden()).sort(SEARCH_SORT).limit(limit + 1))
+    if current_app.config.get("EXPENSE_BUCKETS"):
+        # Bucketed rows can't use the expenses indexes; page each side, then merge
+        stages = _bucket_unwind_stages(match, after)
+        stages += [{"$sort": dict(SEARCH_SORT)}, {"$limit": limit + 1}]
+        for row in db[BUCKETS].aggregate(stages):
+            for field in HIDDEN_FIELDS:
+                row.pop(field, None)
+            rows.append(row)
+        rows.sort(key=lambda d: (d["timestamp"], d["_id"]), reverse=True)
+    return rows[:limit], len(rows) > limit
+
+
+def search_totals(match):
+    """Count and sum of amounts over every expense matching `match`."""
+    res = aggregate_expenses(match, [
+        {"$group": {"_id": None, "count": {"$sum": 1}, "total": {"$sum": "$amount"}}},
+    ])
+    if not res:
+        return 0, 0.0
+    return res[0]["count"], float(res[0]["total"] or 0.0)
+
+
+# ---------- Insights ----------
+# One precomputed document per user, `_id` = user id, written by
+# `python -m scripts.compute_insights` (see app/insights.py).
+INSIGHTS = "insights"
+
+
+def get_insights(user_id):
+    return get_db()[INSIGHTS].find_one({"_id": ObjectId(user_id)})
@@ -1,5 +1,59 @@
 import re
 
+# At most six digits before any separator, and never part of a longer digit run, so
+# phone numbers and order ids ("call 9876543210") aren't read as amounts
+AMOUNT_RE = re.compile(r'(?<!\d)(\d{1,6}(?:,\d{2,3})*(?:\.\d{1,2})?)(?![\d])')
+
+# Item boundaries in utterances like "200 on tea, 450 for uber and 1,200 on groceries".
+# A comma directly followed by a digit group (1,200) is a thousands separator, not a boundary.
+ITEM_SPLIT_RE = re.compile(r'\s*(?:,(?!\d{2,3}\b)|;|\band\b|\bplus\b|\bthen\b|\balso\b)\s*', re.I)
+
+# Small numbers followed by a noun are quantities ("2 cokes"), not money, unless a
+# currency or spend word says otherwise ("paid 5 for parking", "10 rupees tip").
+QUANTITY_MAX = 12
+AMOUNT_CUE_RE = re.compile(r'(?:₹|\brs\.?|\binr|\brupees?|\bspent|\bpaid|\bpay|\bcosts?|\bgave)\s*$', re.I)
+NEXT_WORD_RE = re.compile(r'\s*(₹|[^\W\d_]+)')
+# Words after a number that mark it as the price, not a count
+AMOUNT_FOLLOWERS = {
+    "rs", "rupee", "rupees", "inr", "bucks", "₹",
+    "for", "on", "via", "by", "using", "with", "to", "in", "at", "from", "only", "and",
+}
+
+def find_amount(text: str):
+    """First AMOUNT_RE match in `text` that reads as money rather than a quantity, or None."""
+    for m in AMOUNT_RE.finditer(text):
+        value = float(m.group(1).replace(',', ''))
+        if value > QUANTITY_MAX or AMOUNT_CUE_RE.search(text[:m.start()]):
+            return m
+        nxt = NEXT_WORD_RE.match(text, m.end())
+        if not nxt or nxt.group(1).lower() in AMOUNT_FOLLOWERS:
+            return m
+    return None
+
+def split_expense_text(text: str):
+    """
+    Split an utterance into one text segment per expense.
+    Segments without an amount belong to the item before them ("250 on bread and
+    butter"); only leading ones attach forward ("tea and coffee 200"). Single-expense
+    sentences come back unchanged.
+    """
+    if not text:
+        return []
+    parts = [p.strip() for p in ITEM_SPLIT_RE.split(text.strip()) if p and p.strip()]
+    items, leading = [], []
+    for part in parts:
+        if not find_amount(part):
+            if items:
+                items[-1] = f"{items[-1]} and {part}"
+            else:
+                leading.append(part)
+        else:
+            items.append(" and ".join(leading + [part]))
+            leading = []
+    if leading:
+        items.append(" and ".join(leading))
+    return items
+
 def parse_expense_text(text: str):
     """
     Parse text like "I spent 500 on pizza via Google Pay"
@@ -12,7 +66,8 @@ def parse_expense_text(text: str):
     text = text.lower()
 
     # --- Extract amount ---
-    amount_match = re.search(r'(\d{1,6}(?:[\.,]\d{1,2})?)', text)
+    # Thousands separators in either style: 1,200 / 1,20,000
+    amount_match = find_amount(text) or AMOUNT_RE.search(text)
     amount = float(amount_match.group(1).replace(',', '')) if amount_match else 0.0
 
     # --- Detect payment method ---
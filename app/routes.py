@@ -1,3 +1,4 @@
+import base64
 import os
 import re
 import tempfile
@@ -5,15 +6,25 @@ from datetime import datetime, timedelta
 from typing import Optional
 
 from bson import ObjectId
+from bson.errors import InvalidId
 from flask import Blueprint, render_template, request, jsonify, session, current_app
 
 from app.models import (
     get_db,
-    create_expense,
+    create_expenses,
     list_expenses,
+    aggregate_expenses,
+    delete_bucketed_expense,
+    search_match,
+    search_expenses,
+    search_totals,
+    search_tokens,
+    get_insights,
 )
-from app.nlp_parser import parse_expense_text
-from app.asr import transcribe_with_whisper  # if ASR_BACKEND="whisper"
+from app.nlp_parser import parse_expense_text, split_expense_text
+from app.asr import transcribe, submit_background  # unless ASR_BACKEND="browser"
+from app.metrics import stage, ASR_DECISIONS
+from app.idempotency import idempotent
 
 # ---------- UI ROUTES ----------
 bp = Blueprint("main", __name__)
@@ -51,6 +62,12 @@ def require_user_json():
     return uid, None
 
 
+def asr_backend_for(endpoint: str) -> str:
+    """ASR backend for an endpoint group ("expenses" / "goals"), falling back to ASR_BACKEND."""
+    cfg = current_app.config
+    return cfg.get(f"ASR_BACKEND_{endpoint.upper()}") or cfg.get("ASR_BACKEND", "whisper")
+
+
 def as_oid(x):
     return x if isinstance(x, ObjectId) else ObjectId(str(x))
 
@@ -60,10 +77,39 @@ def goal_slug(name: str) -> str:
     return re.sub(r"[^a-z0-9]+", "-", (name or "").strip().lower()).strip("-")
 
 
+def parse_date_arg(value, end=False):
+    """
+    Parse a `from`/`to` query arg (YYYY-MM-DD or ISO datetime). A bare `to` date
+    is inclusive, so it becomes the next midnight (used as an exclusive bound).
+    """
+    if not value:
+        return None
+    dt = datetime.fromisoformat(value)
+    if end and len(value) == 10:
+        dt += timedelta(days=1)
+    return dt
+
+
+def parse_amount_arg(value):
+    return float(value) if value not in (None, "") else None
+
+
+def encode_cursor(doc):
+    raw = f"{doc['timestamp'].isoformat()}|{doc['_id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor: (timestamp, _id) of the last row already returned."""
+    raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+    ts, _, oid = raw.partition("|")
+    return datetime.fromisoformat(ts), ObjectId(oid)
+
+
 def serialize_goal(g):
     return {
-        "_id": str(g["_id"]),
-        "user_id": str(g["user_id"]),
+        "_id": g["_id"],
+        "user_id": g["user_id"],
         "goal_name": g.get("goal_name") or g.get("name"),
         "target_amount": float(g.get("target_amount", 0.0)),
         "saved_amount": float(g.get("saved_amount", 0.0)),
@@ -74,6 +120,41 @@ def serialize_goal(g):
     }
 
 
+def parse_goal_update(t: str):
+    """Return (amount or None, goal_name or None) from a lowercased goal-update transcript."""
+    # ---- amount: first numeric token ----
+    amt_m = re.search(r'(\d+(?:\.\d{1,2})?)', t)
+    if not amt_m:
+        return None, None
+    amount = float(amt_m.group(1).replace(',', ''))
+
+    # ---- goal name: try several flexible patterns ----
+    goal_name = None
+    goal_patterns = [
+        r'(?:to|into|for|towards)\s+(?:my\s+)?([a-z][a-z0-9 ]+?)(?:\s+goal)?\b',
+        r'\bmy\s+([a-z][a-z0-9 ]+?)(?:\s+goal)?\b',
+        r'\b([a-z][a-z0-9 ]+?)\s+goal\b',
+    ]
+
+    for pat in goal_patterns:
+        m = re.search(pat, t, re.I)
+        if m:
+            goal_name = m.group(1).strip()
+            break
+
+    # Fallback: last few non-noise tokens
+    if not goal_name:
+        noise = {
+            'add', 'put', 'save', 'deposit', 'set', 'aside', 'transfer', 'move',
+            'to', 'into', 'for', 'towards', 'my', 'goal', 'rs', 'rupees', '₹'
+        }
+        tokens = [w for w in re.findall(r'[a-z0-9]+', t) if w not in noise and not w.isdigit()]
+        if tokens:
+            goal_name = ' '.join(tokens[-3:]).strip()
+
+    return amount, goal_name or None
+
+
 # ---------- CATEGORY / PAYMENT DETECTION ----------
 CATEGORY_KEYWORDS = {
     "Food": [
@@ -140,6 +221,121 @@ def infer_payment_method(text: str, given: Optional[str] = None) -> str:
     return "Unknown"
 
 
+def build_expense(text: str, uid) -> dict:
+    """Parse free text into an expense document (amount, category, payment method)."""
+    parsed = parse_expense_text(text) or {}
+    if not parsed.get("amount"):
+        parsed["amount"] = 0.0
+        parsed["meta"] = {"status": "pending_amount"}
+
+    parsed.setdefault("description", text)
+    parsed.setdefault("timestamp", datetime.utcnow())
+    parsed["user_id"] = uid
+
+    parsed["category"] = infer_category(parsed.get("description", ""), parsed.get("category"))
+    parsed["payment_method"] = infer_payment_method(parsed.get("description", ""), parsed.get("payment_method"))
+    return parsed
+
+
+def build_expenses(text: str, uid) -> list:
+    """
+    One expense per item in the utterance ("200 on tea, 450 for uber by UPI").
+    Items that name no payment method inherit the one mentioned for the utterance.
+    """
+    segments = split_expense_text(text)
+    if len(segments) <= 1:
+        return [build_expense(text, uid)]
+
+    shared_payment = infer_payment_method(text)
+    now = datetime.utcnow()
+    docs = []
+    for segment in segments:
+        doc = build_expense(segment, uid)
+        doc["timestamp"] = now
+        if doc["payment_method"] == "Unknown":
+            doc["payment_method"] = shared_payment
+        docs.append(doc)
+    return docs
+
+
+# ---------- HYBRID ASR (browser transcript first, server verifies when unsure) ----------
+def expense_confidence(text: str) -> float:
+    """
+    0..1 trust in an expense transcript: amount found (0.6) + known category (0.4).
+    Only a transcript with both clears the default threshold (0.8).
+    """
+    if not text or not text.strip():
+        return 0.0
+    parsed = parse_expense_text(text) or {}
+    score = 0.6 if parsed.get("amount") else 0.0
+    if infer_category(text) != "Others":
+        score += 0.4
+    return score
+
+
+def goal_confidence(text: str, uid) -> float:
+    """0..1 trust in a goal-update transcript: amount found (0.5) + names an existing goal (0.5)."""
+    if not text or not text.strip():
+        return 0.0
+    amount, goal_name = parse_goal_update(text.strip().lower())
+    score = 0.5 if amount is not None else 0.0
+    if goal_name:
+        db = get_db()
+        if db.goals.find_one({"user_id": as_oid(uid), "slug": goal_slug(goal_name)}, {"_id": 1}):
+            score += 0.5
+    return score
+
+
+def hybrid_transcript(audio_path, browser_text, score, endpoint, allow_background=False):
+    """
+    Return (transcript, source). The browser transcript is used when it scores at
+    least ASR_CONFIDENCE_THRESHOLD; otherwise the server engine runs now, or (with
+    allow_background) the browser text is kept and flagged for later verification.
+    """
+    cfg = current_app.config
+    browser_text = (browser_text or "").strip()
+    with stage("confidence"):
+        confidence = score(browser_text)
+
+    if browser_text and confidence >= cfg.get("ASR_CONFIDENCE_THRESHOLD", 0.8):
+        source = "browser"
+    elif browser_text and allow_background:
+        source = "browser_unverified"
+    else:
+        source = "server"
+    ASR_DECISIONS.inc((endpoint, source))
+
+    if source != "server":
+        return browser_text, source
+    with stage("asr"):
+        return transcribe(audio_path, cfg.get("ASR_HYBRID_ENGINE", "whisper")), source
+
+
+def correct_expense_from_audio(audio_path, backend, uid, expense_id, browser_text):
+    """Background job: re-transcribe a low-confidence voice expense and fix it if the server does better."""
+    try:
+        text = transcribe(audio_path, backend)
+    finally:
+        if os.path.exists(audio_path):
+            os.remove(audio_path)
+
+    db = get_db()
+    q = {"_id": expense_id, "user_id": as_oid(uid)}
+    if expense_confidence(text) <= expense_confidence(browser_text):
+        db.expenses.update_one(q, {"$set": {"meta.asr": "browser_verified"}})
+        return
+
+    fields = build_expense(text, uid)
+    update = {k: fields[k] for k in ("amount", "category", "payment_method", "description")}
+    update["search_tokens"] = search_tokens(fields["description"])
+    update["meta.asr"] = "server_corrected"
+    update["meta.browser_transcript"] = browser_text
+    change = {"$set": update}
+    if fields.get("amount"):
+        change["$unset"] = {"meta.status": ""}
+    db.expenses.update_one(q, change)
+
+
 # ---------- EXPENSES ----------
 @bp.route("/api/expenses", methods=["GET"])
 def api_expenses_get():
@@ -147,20 +343,52 @@ def api_expenses_get():
     if err:
         return err
 
-    limit = int(request.args.get("limit", 50))
-    docs = list_expenses(uid)[:limit]
+    try:
+        limit = max(1, min(int(request.args.get("limit", 50)), 200))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    docs = list_expenses(uid, limit=limit)
+    return jsonify({"expenses": docs}), 200
+
+
+@bp.route("/api/expenses/search", methods=["GET"])
+def api_expenses_search():
+    """
+    /api/expenses/search?q=&category=&from=&to=&min=&max=&limit=&cursor=
+
+    Word-prefix search over descriptions plus filters, newest first. Pass the
+    returned `next_cursor` as `cursor` for the next page. `count` and `total`
+    cover the whole matched set and are only computed for the first page.
+    """
+    uid, err = require_user_json()
+    if err:
+        return err
 
-    out = []
-    for d in docs:
-        d["_id"] = str(d["_id"])
-        d["user_id"] = str(d["user_id"])
-        if isinstance(d.get("timestamp"), datetime):
-            d["timestamp"] = d["timestamp"].isoformat()
-        out.append(d)
-    return jsonify({"expenses": out}), 200
+    args = request.args
+    try:
+        match = search_match(
+            uid,
+            q=args.get("q"),
+            category=args.get("category") or None,
+            start=parse_date_arg(args.get("from")),
+            end=parse_date_arg(args.get("to"), end=True),
+            min_amount=parse_amount_arg(args.get("min")),
+            max_amount=parse_amount_arg(args.get("max")),
+        )
+        after = decode_cursor(args["cursor"]) if args.get("cursor") else None
+        limit = max(1, min(int(args.get("limit", 50)), 200))
+    except (ValueError, InvalidId):
+        return jsonify({"error": "invalid search parameters"}), 400
+
+    docs, has_more = search_expenses(match, limit=limit, after=after)
+    body = {"expenses": docs, "next_cursor": encode_cursor(docs[-1]) if has_more else None}
+    if after is None:
+        body["count"], body["total"] = search_totals(match)
+    return jsonify(body), 200
 
 
 @bp.route("/api/expenses", methods=["POST"])
+@idempotent
 def api_expenses_post():
     uid, err = require_user_json()
     if err:
@@ -171,29 +399,12 @@ def api_expenses_post():
     if not text:
         return jsonify({"error": "description is required"}), 400
 
-    parsed = parse_expense_text(text) or {}
-    if not parsed.get("amount"):
-        parsed["amount"] = 0.0
-        parsed["meta"] = {"status": "pending_amount"}
-
-    parsed.setdefault("description", text)
-    parsed.setdefault("timestamp", datetime.utcnow())
-    parsed["user_id"] = uid
-
-    parsed["category"] = infer_category(parsed.get("description", ""), parsed.get("category"))
-    parsed["payment_method"] = infer_payment_method(parsed.get("description", ""), parsed.get("payment_method"))
-
-    created = create_expense(uid, parsed)
-    if not created:
-        db = get_db()
-        created = db.expenses.find_one({"user_id": as_oid(uid)}, sort=[("_id", -1)])
-
-    created["_id"] = str(created["_id"])
-    created["user_id"] = str(created["user_id"])
-    if isinstance(created.get("timestamp"), datetime):
-        created["timestamp"] = created["timestamp"].isoformat()
+    with stage("parse"):
+        items = build_expenses(text, uid)
 
-    return jsonify({"message": "Expense created", "expense": created}), 201
+    created = create_expenses(uid, items)
+    message = "Expense created" if len(created) == 1 else f"{len(created)} expenses created"
+    return jsonify({"message": message, "expense": created[0], "expenses": created}), 201
 
 
 @bp.route("/api/expenses/<expense_id>", methods=["DELETE"])
@@ -206,10 +417,13 @@ def api_expenses_delete(expense_id):
     res = db.expenses.delete_one({"_id": as_oid(expense_id), "user_id": as_oid(uid)})
     if res.deleted_count:
         return jsonify({"message": "Expense deleted"}), 200
+    if current_app.config.get("EXPENSE_BUCKETS") and delete_bucketed_expense(uid, as_oid(expense_id)):
+        return jsonify({"message": "Expense deleted"}), 200
     return jsonify({"error": "Not found"}), 404
 
 
 @bp.route("/api/expenses/upload-audio", methods=["POST"])
+@idempotent
 def api_expenses_upload_audio():
     uid, err = require_user_json()
     if err:
@@ -220,46 +434,58 @@ def api_expenses_upload_audio():
 
     f = request.files["audio"]
     ext = os.path.splitext(f.filename)[1] or ".wav"
-    with tempfile.NamedTemporaryFile(delete=False, suffix=ext) as tmp:
+    with stage("save_upload"), tempfile.NamedTemporaryFile(delete=False, suffix=ext) as tmp:
         f.save(tmp.name)
         tmp_path = tmp.name
 
+    asr_source = None
+    verify_later = False
     try:
-        backend = current_app.config.get("ASR_BACKEND", "whisper")
-        if backend == "whisper":
-            transcript = transcribe_with_whisper(tmp_path)
+        backend = asr_backend_for("expenses")
+        if backend == "hybrid":
+            browser_text = request.form.get("transcript")
+            # Background verification corrects a single expense; an utterance that
+            # splits into several items is checked by the server engine right away
+            background = (
+                current_app.config.get("ASR_VERIFY_IN_BACKGROUND", False)
+                and len(split_expense_text(browser_text or "")) <= 1
+            )
+            transcript, asr_source = hybrid_transcript(
+                tmp_path, browser_text, expense_confidence, "expenses", allow_background=background,
+            )
+            verify_later = asr_source == "browser_unverified"
+        elif backend != "browser":
+            with stage("asr"):
+                transcript = transcribe(tmp_path, backend)
         else:
             transcript = request.form.get("transcript")
     except Exception as e:
         os.remove(tmp_path)
         return jsonify({"error": "ASR failed", "details": str(e)}), 500
     finally:
-        if os.path.exists(tmp_path):
+        # A deferred verification takes ownership of the file and removes it when done
+        if not verify_later and os.path.exists(tmp_path):
             os.remove(tmp_path)
 
-    parsed = parse_expense_text(transcript) or {}
-    if not parsed.get("amount"):
-        parsed["amount"] = 0.0
-        parsed["meta"] = {"status": "pending_amount"}
-
-    parsed.setdefault("description", transcript)
-    parsed.setdefault("timestamp", datetime.utcnow())
-    parsed["user_id"] = uid
-
-    parsed["category"] = infer_category(parsed.get("description", ""), parsed.get("category"))
-    parsed["payment_method"] = infer_payment_method(parsed.get("description", ""), parsed.get("payment_method"))
+    with stage("parse"):
+        items = build_expenses(transcript, uid)
+        if asr_source:
+            for item in items:
+                item.setdefault("meta", {})["asr"] = asr_source
 
-    created = create_expense(uid, parsed)
-    if not created:
-        db = get_db()
-        created = db.expenses.find_one({"user_id": as_oid(uid)}, sort=[("_id", -1)])
+    # One transcription, one write, however many items were spoken
+    created = create_expenses(uid, items)
 
-    created["_id"] = str(created["_id"])
-    created["user_id"] = str(created["user_id"])
-    if isinstance(created.get("timestamp"), datetime):
-        created["timestamp"] = created["timestamp"].isoformat()
+    if verify_later:
+        submit_background(
+            current_app._get_current_object(), correct_expense_from_audio,
+            tmp_path, current_app.config.get("ASR_HYBRID_ENGINE", "whisper"), uid, created[0]["_id"], transcript,
+        )
 
-    return jsonify({"message": "Expense saved", "transcript": transcript, "expense": created}), 201
+    message = "Expense saved" if len(created) == 1 else f"{len(created)} expenses saved"
+    return jsonify(
+        {"message": message, "transcript": transcript, "asr": asr_source, "expense": created[0], "expenses": created}
+    ), 201
 
 
 # ---------- GOALS ----------
@@ -344,6 +570,7 @@ def api_goals_delete(goal_id):
 
 
 @bp.route("/api/goals/voice-update", methods=["POST"])
+@idempotent
 def api_goals_voice_update():
     """
     Voice updates for existing goals.
@@ -361,13 +588,20 @@ def api_goals_voice_update():
         if "audio" in request.files:
             f = request.files["audio"]
             ext = os.path.splitext(f.filename)[1] or ".webm"
-            with tempfile.NamedTemporaryFile(delete=False, suffix=ext) as tmp:
+            with stage("save_upload"), tempfile.NamedTemporaryFile(delete=False, suffix=ext) as tmp:
                 f.save(tmp.name)
                 fpath = tmp.name
 
-        backend = current_app.config.get("ASR_BACKEND", "whisper")
-        if backend == "whisper" and fpath:
-            transcript = transcribe_with_whisper(fpath)
+        backend = asr_backend_for("goals")
+        if backend == "hybrid" and fpath:
+            # Deposits are not corrected after the fact, so low confidence always verifies inline
+            transcript, _source = hybrid_transcript(
+                fpath, request.form.get("transcript"), lambda t: goal_confidence(t, uid), "goals",
+                allow_background=False,
+            )
+        elif backend not in ("browser", "hybrid") and fpath:
+            with stage("asr"):
+                transcript = transcribe(fpath, backend)
         else:
             transcript = request.form.get("transcript")
     except Exception as e:
@@ -384,38 +618,14 @@ def api_goals_voice_update():
     raw_transcript = transcript.strip()
     t = raw_transcript.lower()
 
-    # ---- amount: first numeric token ----
-    amt_m = re.search(r'(\d+(?:\.\d{1,2})?)', t)
-    if not amt_m:
+    with stage("parse"):
+        amount, goal_name = parse_goal_update(t)
+
+    if amount is None:
         return jsonify({
             "error": "Could not parse amount from voice",
             "transcript": raw_transcript
         }), 400
-    amount = float(amt_m.group(1).replace(',', ''))
-
-    # ---- goal name: try several flexible patterns ----
-    goal_name = None
-    goal_patterns = [
-        r'(?:to|into|for|towards)\s+(?:my\s+)?([a-z][a-z0-9 ]+?)(?:\s+goal)?\b',
-        r'\bmy\s+([a-z][a-z0-9 ]+?)(?:\s+goal)?\b',
-        r'\b([a-z][a-z0-9 ]+?)\s+goal\b',
-    ]
-
-    for pat in goal_patterns:
-        m = re.search(pat, t, re.I)
-        if m:
-            goal_name = m.group(1).strip()
-            break
-
-    # Fallback: last few non-noise tokens
-    if not goal_name:
-        noise = {
-            'add', 'put', 'save', 'deposit', 'set', 'aside', 'transfer', 'move',
-            'to', 'into', 'for', 'towards', 'my', 'goal', 'rs', 'rupees', '₹'
-        }
-        tokens = [w for w in re.findall(r'[a-z0-9]+', t) if w not in noise and not w.isdigit()]
-        if tokens:
-            goal_name = ' '.join(tokens[-3:]).strip()
 
     if not goal_name:
         return jsonify({"error": "Could not parse goal update", "transcript": raw_transcript}), 400
@@ -455,6 +665,16 @@ def api_goals_voice_update():
 
 
 # ---------- ANALYTICS (dashboard + charts) ----------
+@bp.route("/api/insights", methods=["GET"])
+def api_insights():
+    """Precomputed trends, anomalies and goal projections (null until the batch job has run)."""
+    uid, err = require_user_json()
+    if err:
+        return err
+
+    return jsonify({"insights": get_insights(uid)}), 200
+
+
 @bp.route("/api/analytics/summary", methods=["GET"])
 def api_analytics_summary():
     uid, err = require_user_json()
@@ -466,11 +686,11 @@ def api_analytics_summary():
 
     # total spent / count / avg in last 30 days
     match = {"user_id": as_oid(uid), "timestamp": {"$gte": since}}
-    pipeline = [
-        {"$match": match},
-        {"$group": {"_id": None, "total": {"$sum": "$amount"}, "count": {"$sum": 1}}},
-    ]
-    agg = list(db.expenses.aggregate(pipeline))
+    agg = aggregate_expenses(
+        match,
+        [{"$group": {"_id": None, "total": {"$sum": "$amount"}, "count": {"$sum": 1}}}],
+        db=db,
+    )
     total_spent = float(agg[0]["total"]) if agg else 0.0
     total_expenses = int(agg[0]["count"]) if agg else 0
     avg_expense = (total_spent / total_expenses) if total_expenses else 0.0
@@ -497,12 +717,14 @@ def api_analytics_category_wise():
 
     db = get_db()
     since = datetime.utcnow() - timedelta(days=30)
-    pipeline = [
-        {"$match": {"user_id": as_oid(uid), "timestamp": {"$gte": since}}},
-        {"$group": {"_id": "$category", "total": {"$sum": "$amount"}}},
-        {"$sort": {"total": -1}},
-    ]
-    data = list(db.expenses.aggregate(pipeline))
+    data = aggregate_expenses(
+        {"user_id": as_oid(uid), "timestamp": {"$gte": since}},
+        [
+            {"$group": {"_id": "$category", "total": {"$sum": "$amount"}}},
+            {"$sort": {"total": -1}},
+        ],
+        db=db,
+    )
     for d in data:
         d["total"] = float(d.get("total", 0))
         if d.get("_id") in (None, "", "Unknown"):
@@ -518,17 +740,19 @@ def api_analytics_month_wise():
 
     db = get_db()
     since = datetime.utcnow() - timedelta(days=180)  # ~6 months
-    pipeline = [
-        {"$match": {"user_id": as_oid(uid), "timestamp": {"$gte": since}}},
-        {
-            "$group": {
-                "_id": {"$dateToString": {"format": "%Y-%m", "date": "$timestamp"}},
-                "total": {"$sum": "$amount"},
-            }
-        },
-        {"$sort": {"_id": 1}},
-    ]
-    data = list(db.expenses.aggregate(pipeline))
+    data = aggregate_expenses(
+        {"user_id": as_oid(uid), "timestamp": {"$gte": since}},
+        [
+            {
+                "$group": {
+                    "_id": {"$dateToString": {"format": "%Y-%m", "date": "$timestamp"}},
+                    "total": {"$sum": "$amount"},
+                }
+            },
+            {"$sort": {"_id": 1}},
+        ],
+        db=db,
+    )
     for d in data:
         d["total"] = float(d.get("total", 0))
     return jsonify({"data": data}), 200
@@ -553,32 +777,42 @@ def api_qa():
     year_start = datetime(now.year, 1, 1)
 
     def sum_amount(match):
-        pipeline = [{"$match": match}, {"$group": {"_id": None, "total": {"$sum": "$amount"}}}]
-        agg = list(db.expenses.aggregate(pipeline))
+        agg = aggregate_expenses(match, [{"$group": {"_id": None, "total": {"$sum": "$amount"}}}], db=db)
         return float(agg[0]["total"]) if agg else 0.0
 
     def count_docs(match):
-        return db.expenses.count_documents(match)
+        if not current_app.config.get("EXPENSE_BUCKETS"):
+            return db.expenses.count_documents(match)
+        agg = aggregate_expenses(match, [{"$count": "n"}], db=db)
+        return int(agg[0]["n"]) if agg else 0
 
     def top_category(match, ascending=False):
         s = -1 if not ascending else 1
-        pipeline = [
-            {"$match": match},
-            {"$group": {"_id": "$category", "total": {"$sum": "$amount"}}},
-            {"$sort": {"total": s}},
-            {"$limit": 1},
-        ]
-        res = list(db.expenses.aggregate(pipeline))
+        res = aggregate_expenses(
+            match,
+            [
+                {"$group": {"_id": "$category", "total": {"$sum": "$amount"}}},
+                {"$sort": {"total": s}},
+                {"$limit": 1},
+            ],
+            db=db,
+        )
         return res[0] if res else None
 
     def top_date(match):
-        pipeline = [
-            {"$match": match},
-            {"$group": {"_id": {"$dateToString": {"format": "%Y-%m-%d", "date": "$timestamp"}}, "total": {"$sum": "$amount"}}},
-            {"$sort": {"total": -1}},
-            {"$limit": 1},
-        ]
-        res = list(db.expenses.aggregate(pipeline))
+        res = aggregate_expenses(
+            match,
+            [
+                {"$group": {"_id": {"$dateToString": {"format": "%Y-%m-%d", "date": "$timestamp"}}, "total": {"$sum": "$amount"}}},
+                {"$sort": {"total": -1}},
+                {"$limit": 1},
+            ],
+            db=db,
+        )
+        return res[0] if res else None
+
+    def extreme_expense(direction):
+        res = aggregate_expenses({"user_id": as_oid(uid)}, [{"$sort": {"amount": direction}}, {"$limit": 1}], db=db)
         return res[0] if res else None
 
     # Helper: active (first incomplete) goal
@@ -621,12 +855,12 @@ def api_qa():
         val = sum_amount({"user_id": as_oid(uid), "payment_method": "Cash"})
         return jsonify({"question_id": 9, "answer": f"You spent ₹{val:.2f} using Cash."}), 200
     if q == 10:
-        doc = db.expenses.find_one({"user_id": as_oid(uid)}, sort=[("amount", -1)])
+        doc = extreme_expense(-1)
         if doc:
             return jsonify({"question_id": 10, "answer": f"Your biggest expense was ₹{float(doc['amount']):.2f} ({doc.get('description','')})."}), 200
         return jsonify({"error": "No expenses found"}), 200
     if q == 11:
-        doc = db.expenses.find_one({"user_id": as_oid(uid)}, sort=[("amount", 1)])
+        doc = extreme_expense(1)
         if doc:
             return jsonify({"question_id": 11, "answer": f"Your smallest expense was ₹{float(doc['amount']):.2f} ({doc.get('description','')})."}), 200
         return jsonify({"error": "No expenses found"}), 200
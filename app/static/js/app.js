@@ -0,0 +1,799 @@
+/* =========================
+   Voice Expense Logger - app.js
+   ========================= */
+
+// Use same-origin API to avoid CORS issues
+const API_BASE = `${window.location.origin}/api`;
+
+let mediaRecorder;
+let audioChunks = [];
+let currentUser = null;
+let speech = null;
+
+/* ---------- Utilities ---------- */
+
+// Safely parse JSON; if the server returned HTML/text, surface that gracefully
+async function safeJson(res) {
+  const ct = res.headers.get('content-type') || '';
+  if (ct.includes('application/json')) return await res.json();
+  const text = await res.text();
+  return { error: text.slice(0, 300) };
+}
+
+// POST that is safe to retry: one Idempotency-Key per logical submit, reused on
+// every attempt, so the server saves it once even if a response gets lost.
+// Retries network errors and 5xx up to `attempts` times. A 409 means the first
+// attempt is still running: keep polling (per Retry-After) for up to
+// IN_PROGRESS_WAIT_MS, which covers the server's idempotency lease, so a slow
+// transcription finishes or a dead one is taken over.
+const IN_PROGRESS_WAIT_MS = 150000;
+
+async function postOnce(url, options, attempts = 3) {
+  const key = (crypto.randomUUID && crypto.randomUUID()) || `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+  const headers = { ...(options.headers || {}), 'Idempotency-Key': key };
+  const started = Date.now();
+  for (let i = 1; ; ) {
+    let delay = 500 * 2 ** (i - 1);
+    try {
+      const res = await fetch(url, { ...options, method: 'POST', headers });
+      if (res.status === 409) {
+        delay = 1000 * (parseFloat(res.headers.get('Retry-After')) || 2);
+        if (Date.now() - started + delay > IN_PROGRESS_WAIT_MS) return res;
+      } else if (res.status < 500 || i++ >= attempts) {
+        return res;
+      }
+    } catch (err) {
+      if (i++ >= attempts) throw err;
+    }
+    await new Promise((r) => setTimeout(r, delay));
+  }
+}
+
+// Pick a recording MIME the browser actually supports
+function getSupportedMime() {
+  const candidates = [
+    'audio/webm;codecs=opus',
+    'audio/webm',
+    'audio/ogg;codecs=opus',
+    'audio/ogg',
+  ];
+  for (const c of candidates) {
+    try {
+      if (MediaRecorder.isTypeSupported(c)) return c;
+    } catch {}
+  }
+  return ''; // let browser choose default
+}
+const AUDIO_MIME = getSupportedMime();
+
+// Whisper only needs 16 kHz mono speech; encoding just that at a low Opus
+// bitrate keeps uploads to ~2 KB per second of audio.
+const TARGET_SAMPLE_RATE = 16000;
+const OPUS_BITRATE = 16000;
+
+function audioExtension(mime) {
+  if (mime.includes('ogg')) return 'ogg';
+  if (mime.includes('mp4')) return 'm4a';
+  if (mime.includes('wav')) return 'wav';
+  return 'webm';
+}
+
+// Open the mic and build a MediaRecorder that encodes downmixed 16 kHz mono audio.
+// Falls back to the raw mic stream where the browser can't resample (e.g. Firefox).
+async function openRecorder() {
+  const stream = await navigator.mediaDevices.getUserMedia({
+    audio: { channelCount: 1, sampleRate: TARGET_SAMPLE_RATE, echoCancellation: true, noiseSuppression: true },
+  });
+  let ctx = null;
+  let source = stream;
+  try {
+    ctx = new AudioContext({ sampleRate: TARGET_SAMPLE_RATE });
+    const input = ctx.createMediaStreamSource(stream);
+    const dest = ctx.createMediaStreamDestination();
+    dest.channelCount = 1;
+    dest.channelCountMode = 'explicit';
+    dest.channelInterpretation = 'speakers';
+    input.connect(dest);
+    source = dest.stream;
+  } catch {
+    if (ctx) ctx.close();
+    ctx = null;
+  }
+
+  const opts = { audioBitsPerSecond: OPUS_BITRATE };
+  if (AUDIO_MIME) opts.mimeType = AUDIO_MIME;
+  const rec = new MediaRecorder(source, opts);
+  rec.release = () => {
+    stream.getTracks().forEach((t) => t.stop());
+    if (ctx) ctx.close();
+  };
+  return rec;
+}
+
+// Web Speech recognition runs alongside the recorder. The server (ASR_BACKEND=hybrid)
+// uses this transcript directly and only runs its own ASR when it parses poorly.
+const SpeechRec = window.SpeechRecognition || window.webkitSpeechRecognition;
+
+function startBrowserTranscript() {
+  const none = { stop: async () => '' };
+  if (!SpeechRec) return none;
+  const rec = new SpeechRec();
+  rec.lang = 'en-IN';
+  rec.continuous = true;
+  rec.interimResults = false;
+  let text = '';
+  const ended = new Promise((resolve) => { rec.onend = () => resolve(text.trim()); });
+  rec.onerror = () => {};
+  rec.onresult = (e) => {
+    for (let i = e.resultIndex; i < e.results.length; i++) {
+      if (e.results[i].isFinal) text += ' ' + e.results[i][0].transcript;
+    }
+  };
+  try { rec.start(); } catch { return none; }
+  return {
+    stop: () => {
+      try { rec.stop(); } catch {}
+      // Don't hold the upload hostage if the recognizer never fires onend
+      return Promise.race([ended, new Promise((r) => setTimeout(() => r(text.trim()), 1500))]);
+    },
+  };
+}
+
+// Blob labelled with what the recorder actually produced
+function recordedBlob(rec, chunks) {
+  const type = rec.mimeType || AUDIO_MIME || 'audio/webm';
+  return { blob: new Blob(chunks, { type }), filename: `recording.${audioExtension(type)}` };
+}
+
+/* ---------- Tabs ---------- */
+
+document.querySelectorAll('.tab-btn').forEach((btn) => {
+  btn.addEventListener('click', () => switchTab(btn.dataset.tab));
+});
+
+function switchTab(tab) {
+  // Special-case logout to avoid errors when nav button becomes 'Logout'
+  if (tab === 'logout') { return logout(); }
+
+  const target = document.getElementById(tab);
+  if (!target) return; // ignore unknown tabs safely
+
+  document.querySelectorAll('.tab-content').forEach((t) => t.classList.remove('active'));
+  document.querySelectorAll('.tab-btn').forEach((b) => b.classList.remove('active'));
+  target.classList.add('active');
+  const btn = document.querySelector(`[data-tab="${tab}"]`);
+  if (btn) btn.classList.add('active');
+}
+
+/* ---------- Notifications & Modal ---------- */
+
+function showNotification(message, type = 'success') {
+  const n = document.createElement('div');
+  n.className = `notification ${type}`;
+  n.textContent = message;
+  document.body.appendChild(n);
+  setTimeout(() => {
+    n.style.animation = 'slideIn .3s reverse';
+    setTimeout(() => n.remove(), 300);
+  }, 3000);
+}
+
+function showGoalCompletedModal(msg) {
+  document.getElementById('goalModalMessage').textContent = msg;
+  document.getElementById('goalModal').classList.add('active');
+}
+
+/* ---------- Recording: Expenses ---------- */
+
+async function startExpenseRecording() {
+  audioChunks = [];
+  mediaRecorder = await openRecorder();
+  mediaRecorder.ondataavailable = (e) => audioChunks.push(e.data);
+  mediaRecorder.start();
+  speech = startBrowserTranscript();
+
+  document.getElementById('startExpenseBtn').style.display = 'none';
+  document.getElementById('stopExpenseBtn').style.display = 'block';
+  document.getElementById('expenseStatus').textContent = 'Recording...';
+  document.getElementById('expenseStatus').classList.add('recording');
+}
+
+function stopExpenseRecording() {
+  mediaRecorder.stop();
+  document.getElementById('startExpenseBtn').style.display = 'block';
+  document.getElementById('stopExpenseBtn').style.display = 'none';
+  document.getElementById('expenseStatus').textContent = 'Processing...';
+  document.getElementById('expenseStatus').classList.remove('recording');
+
+  mediaRecorder.onstop = async () => {
+    // ✅ Use real MIME & extension (16 kHz mono WebM/Opus by default)
+    mediaRecorder.release();
+    const { blob, filename } = recordedBlob(mediaRecorder, audioChunks);
+    const transcript = speech ? await speech.stop() : '';
+    await submitExpenseAudio(blob, filename, transcript);
+  };
+}
+
+/* ---------- Recording: Goals ---------- */
+
+async function startGoalRecording() {
+  audioChunks = [];
+  mediaRecorder = await openRecorder();
+  mediaRecorder.ondataavailable = (e) => audioChunks.push(e.data);
+  mediaRecorder.start();
+  speech = startBrowserTranscript();
+
+  document.getElementById('startGoalBtn').style.display = 'none';
+  document.getElementById('stopGoalBtn').style.display = 'block';
+  document.getElementById('goalStatus').textContent = 'Recording...';
+  document.getElementById('goalStatus').classList.add('recording');
+}
+
+function stopGoalRecording() {
+  mediaRecorder.stop();
+  document.getElementById('startGoalBtn').style.display = 'block';
+  document.getElementById('stopGoalBtn').style.display = 'none';
+  document.getElementById('goalStatus').textContent = 'Processing...';
+  document.getElementById('goalStatus').classList.remove('recording');
+
+  mediaRecorder.onstop = async () => {
+    mediaRecorder.release();
+    const { blob, filename } = recordedBlob(mediaRecorder, audioChunks);
+    const transcript = speech ? await speech.stop() : '';
+    await submitGoalAudio(blob, filename, transcript);
+  };
+}
+
+/* ---------- Submit audio ---------- */
+
+async function submitExpenseAudio(audioBlob, filename, transcript) {
+  try {
+    const formData = new FormData();
+    formData.append('audio', audioBlob, filename || 'recording.webm');
+    if (transcript) formData.append('transcript', transcript);
+
+    const t0 = performance.now();
+    const res = await postOnce(`${API_BASE}/expenses/upload-audio`, {
+      credentials: 'include',
+      body: formData,
+    });
+    const data = await safeJson(res);
+    console.debug(`voice expense: ${audioBlob.size} bytes (${audioBlob.type}), ${Math.round(performance.now() - t0)} ms end-to-end`);
+
+    if (res.ok) {
+      const items = data.expenses || [data.expense];
+      const summary = items.map((e) => `₹${e.amount} - ${e.category}`).join(', ');
+      showNotification(items.length > 1 ? `${items.length} expenses logged: ${summary}` : `Expense logged: ${summary}`, 'success');
+      if (typeof loadExpenses === 'function') loadExpenses();
+      if (typeof loadDashboard === 'function') loadDashboard();
+      document.getElementById('expenseStatus').textContent = 'Ready';
+    } else {
+      showNotification(data.error || 'Failed to log expense', 'error');
+      document.getElementById('expenseStatus').textContent = 'Ready';
+    }
+  } catch (err) {
+    showNotification('Error: ' + err.message, 'error');
+    document.getElementById('expenseStatus').textContent = 'Ready';
+  }
+}
+
+// Submit Goal (audio) — replace your current function with this one
+async function submitGoalAudio(audioBlob, filename, transcript){
+  try{
+    const formData = new FormData();
+    formData.append('audio', audioBlob, filename || 'recording.webm');
+    if (transcript) formData.append('transcript', transcript);
+
+    const t0 = performance.now();
+    const res = await postOnce(`${API_BASE}/goals/voice-update`, {
+      credentials:'include',
+      body:formData
+    });
+
+    const data = await res.json();
+    console.debug(`voice goal: ${audioBlob.size} bytes (${audioBlob.type}), ${Math.round(performance.now() - t0)} ms end-to-end`);
+
+    if(res.ok){
+      // Prefer a positive toast first
+      const goalName = data.goal?.goal_name || 'goal';
+      showNotification(`Saved ₹${Math.round((data.saved_amount || 0) * 100)/100} to ${goalName}`, 'success');
+
+      // Then show completion / exceeded states from the backend
+      if (data.exceeded) {
+        const over = Math.round((data.over_by || 0) * 100) / 100;
+        showNotification(`Heads up: target exceeded by ₹${over}`, 'error');
+      } else if (data.goal_completed) {
+        showGoalCompletedModal('Your goal is complete! Time to reward yourself!');
+      }
+
+      // Refresh UI
+      loadGoals();
+      loadDashboard();
+      document.getElementById('goalStatus').textContent = 'Ready';
+    }else{
+      showNotification(data.error || 'Failed to update goal', 'error');
+      document.getElementById('goalStatus').textContent = 'Ready';
+    }
+  }catch(err){
+    showNotification('Error: ' + err.message, 'error');
+    document.getElementById('goalStatus').textContent = 'Ready';
+  }
+}
+
+
+/* ---------- Manual Expense ---------- */
+
+async function submitManualExpense() {
+  const text = document.getElementById('manualExpenseText').value;
+  if (!text.trim()) return showNotification('Please enter expense details', 'error');
+
+  try {
+    const res = await postOnce(`${API_BASE}/expenses`, {
+      credentials: 'include',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ description: text }),
+    });
+    const data = await safeJson(res);
+
+    if (res.ok) {
+      showNotification('Expense added successfully', 'success');
+      document.getElementById('manualExpenseText').value = '';
+      if (typeof loadExpenses === 'function') loadExpenses();
+      if (typeof loadDashboard === 'function') loadDashboard();
+    } else {
+      showNotification(data.error || 'Failed to add expense', 'error');
+    }
+  } catch (err) {
+    showNotification('Error: ' + err.message, 'error');
+  }
+}
+
+/* ---------- Expenses (list/delete) ---------- */
+
+async function loadExpenses() {
+  try {
+    const res = await fetch(`${API_BASE}/expenses?limit=50`, { credentials: 'include' });
+    const data = await safeJson(res);
+
+    if (res.ok && data.expenses.length > 0) {
+      let html = '';
+      data.expenses.slice(0, 10).forEach((exp) => {
+        const date = new Date(exp.timestamp).toLocaleDateString('en-IN', {
+          year: 'numeric',
+          month: 'short',
+          day: 'numeric',
+          hour: '2-digit',
+          minute: '2-digit',
+        });
+        const category = exp.category || '—';
+        const payment = exp.payment_method || '—';
+
+        html += `
+          <div class="list-item">
+            <div class="list-item-content">
+              <div class="list-item-header">
+                <span class="badge badge-category">${category}</span>
+                <span class="badge badge-payment">${payment}</span>
+              </div>
+              <div class="list-item-detail">₹ ${exp.amount}</div>
+              <div class="list-item-detail">${exp.description || ''}</div>
+              <div class="list-item-detail" style="color:#999;font-size:.8em;">${date}</div>
+            </div>
+            <button class="btn btn-danger" onclick="deleteExpense('${exp._id}')" style="padding:5px 10px;">Delete</button>
+          </div>`;
+      });
+      document.getElementById('expensesList').innerHTML = html;
+      const recent = document.getElementById('recentExpenses');
+      if (recent) recent.innerHTML = html;
+    } else {
+      const empty = '<div class="empty-state">No expenses yet. Start recording to add expenses!</div>';
+      document.getElementById('expensesList').innerHTML = empty;
+      const recent = document.getElementById('recentExpenses');
+      if (recent) recent.innerHTML = empty;
+    }
+  } catch (err) {
+    console.error('Error loading expenses:', err);
+  }
+}
+
+async function deleteExpense(id) {
+  if (!confirm('Delete this expense?')) return;
+  try {
+    const res = await fetch(`${API_BASE}/expenses/${id}`, { method: 'DELETE', credentials: 'include' });
+    if (res.ok) {
+      showNotification('Expense deleted', 'success');
+      if (typeof loadExpenses === 'function') loadExpenses();
+      if (typeof loadDashboard === 'function') loadDashboard();
+    } else {
+      showNotification('Failed to delete expense', 'error');
+    }
+  } catch (err) {
+    showNotification('Error: ' + err.message, 'error');
+  }
+}
+
+/* ---------- Goals (CRUD + list) ---------- */
+
+async function createGoal() {
+  const goalName = document.getElementById('goalName').value;
+  const goalTarget = document.getElementById('goalTarget').value;
+
+  if (!goalName || !goalTarget) return showNotification('Please fill all fields', 'error');
+
+  try {
+    const res = await fetch(`${API_BASE}/goals`, {
+      method: 'POST',
+      credentials: 'include',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ goal_name: goalName, target_amount: parseFloat(goalTarget) }),
+    });
+    const data = await safeJson(res);
+
+    if (res.ok) {
+      showNotification('Goal created successfully', 'success');
+      document.getElementById('goalName').value = '';
+      document.getElementById('goalTarget').value = '';
+      if (typeof loadGoals === 'function') loadGoals();
+      if (typeof loadDashboard === 'function') loadDashboard();
+    } else {
+      showNotification(data.error || 'Failed to create goal', 'error');
+    }
+  } catch (err) {
+    showNotification('Error: ' + err.message, 'error');
+  }
+}
+
+async function loadGoals() {
+  try {
+    const res = await fetch(`${API_BASE}/goals`, { credentials: 'include' });
+    const data = await safeJson(res);
+
+    if (res.ok && data.goals.length > 0) {
+      let html = '';
+      data.goals.forEach((goal) => {
+        const saved = Number(goal.saved_amount || 0);
+        const target = Number(goal.target_amount || 0) || 1;
+        const progress = Math.min((saved / target) * 100, 100);
+
+        html += `
+          <div class="list-item">
+            <div class="list-item-content">
+              <div class="list-item-header">${goal.goal_name || goal.name}</div>
+              <div class="list-item-detail">Saved: ₹${saved} / ₹${target}</div>
+              <div class="progress-bar">
+                <div class="progress-fill" style="width:${progress}%"></div>
+              </div>
+              <div class="list-item-detail" style="margin-top:5px;">
+                ${Math.round(progress)}% Complete ${goal.is_completed ? '✓' : ''}
+              </div>
+            </div>
+            <button class="btn btn-danger" onclick="deleteGoal('${goal._id}')" style="padding:5px 10px;">Delete</button>
+          </div>`;
+      });
+      const box = document.getElementById('goalsList');
+      if (box) box.innerHTML = html;
+    } else {
+      const box = document.getElementById('goalsList');
+      if (box) box.innerHTML = '<div class="empty-state">No goals yet. Create one to start saving!</div>';
+    }
+  } catch (err) {
+    console.error('Error loading goals:', err);
+  }
+}
+
+async function deleteGoal(id) {
+  if (!confirm('Delete this goal?')) return;
+  try {
+    const res = await fetch(`${API_BASE}/goals/${id}`, { method: 'DELETE', credentials: 'include' });
+    if (res.ok) {
+      showNotification('Goal deleted', 'success');
+      if (typeof loadGoals === 'function') loadGoals();
+      if (typeof loadDashboard === 'function') loadDashboard();
+    } else {
+      showNotification('Failed to delete goal', 'error');
+    }
+  } catch (err) {
+    showNotification('Error: ' + err.message, 'error');
+  }
+}
+
+/* ---------- Dashboard & Analytics ---------- */
+
+async function loadDashboard() {
+  try {
+    const res = await fetch(`${API_BASE}/analytics/summary`, { credentials: 'include' });
+    const data = await safeJson(res);
+
+    if (res.ok) {
+      const stats = `
+        <div class="stat-card"><div class="stat-value">₹${Number(data.total_spent || 0).toFixed(2)}</div><div class="stat-label">Total Spent</div></div>
+        <div class="stat-card"><div class="stat-value">₹${Number(data.avg_expense || 0).toFixed(2)}</div><div class="stat-label">Avg Expense</div></div>
+        <div class="stat-card"><div class="stat-value">${Number(data.total_expenses || 0)}</div><div class="stat-label">Total Transactions</div></div>
+        <div class="stat-card"><div class="stat-value">₹${Number(data.total_saved || 0).toFixed(2)}</div><div class="stat-label">Total Saved</div></div>`;
+      const grid1 = document.getElementById('statsGrid');
+      const grid2 = document.getElementById('analyticsStats');
+      if (grid1) grid1.innerHTML = stats;
+      if (grid2) grid2.innerHTML = stats;
+    }
+  } catch (err) {
+    console.error('Error loading dashboard:', err);
+  }
+}
+
+async function loadAnalytics() {
+  try {
+    const catRes = await fetch(`${API_BASE}/analytics/category-wise`, { credentials: 'include' });
+    const cat = await safeJson(catRes);
+    if (catRes.ok && (cat.data || []).length > 0) {
+      Plotly.newPlot(
+        'categoryChart',
+        [{ labels: cat.data.map((d) => d._id), values: cat.data.map((d) => d.total), type: 'pie' }],
+        { title: 'Expenses by Category', font: { size: 12 } },
+        { responsive: true }
+      );
+    }
+
+    const mRes = await fetch(`${API_BASE}/analytics/month-wise`, { credentials: 'include' });
+    const mon = await safeJson(mRes);
+    if (mRes.ok && (mon.data || []).length > 0) {
+      Plotly.newPlot(
+        'monthlyChart',
+        [{ x: mon.data.map((d) => d._id), y: mon.data.map((d) => d.total), type: 'scatter', mode: 'lines+markers', fill: 'tozeroy' }],
+        { title: 'Monthly Spending Trend', xaxis: { title: 'Month' }, yaxis: { title: 'Amount (₹)' }, font: { size: 12 } },
+        { responsive: true }
+      );
+    }
+  } catch (err) {
+    console.error('Error loading analytics:', err);
+  }
+}
+
+/* ---------- Auth UI & actions ---------- */
+
+async function handleAuth() {
+  const el = document.getElementById('authContent');
+  if (!el) return;
+
+  if (currentUser) {
+    el.innerHTML = `
+      <p>Welcome, <strong>${currentUser.username || currentUser.email || currentUser.user_id}</strong></p>
+      <button class="btn btn-danger" onclick="logout()">Logout</button>`;
+  } else {
+    el.innerHTML = `
+      <div style="max-width:400px;margin:0 auto;">
+        <div style="margin-bottom:20px;">
+          <h3>Login</h3>
+          <input type="email" id="loginEmail" placeholder="Email" style="width:100%;padding:10px;margin-bottom:10px;border:1px solid #ddd;border-radius:5px;">
+          <input type="password" id="loginPassword" placeholder="Password" style="width:100%;padding:10px;margin-bottom:10px;border:1px solid #ddd;border-radius:5px;">
+          <button class="btn btn-primary" style="width:100%;" onclick="login()">Login</button>
+        </div>
+        <div>
+          <h3>Signup</h3>
+          <input type="text" id="signupUsername" placeholder="Username" style="width:100%;padding:10px;margin-bottom:10px;border:1px solid #ddd;border-radius:5px;">
+          <input type="email" id="signupEmail" placeholder="Email" style="width:100%;padding:10px;margin-bottom:10px;border:1px solid #ddd;border-radius:5px;">
+          <input type="password" id="signupPassword" placeholder="Password" style="width:100%;padding:10px;margin-bottom:10px;border:1px solid #ddd;border-radius:5px;">
+          <button class="btn btn-success" style="width:100%;" onclick="signup()">Signup</button>
+        </div>
+      </div>`;
+  }
+
+  // Update navigation login/logout button to reflect auth state
+  updateNavAuth();
+}
+
+// Toggle the nav button between Login and Logout
+function updateNavAuth() {
+  const navBtn = document.querySelector('.tab-btn[data-tab="login"]');
+  if (!navBtn) return;
+  if (currentUser) {
+    navBtn.textContent = 'Logout';
+    navBtn.onclick = () => logout();
+    navBtn.dataset.tab = 'logout';
+  } else {
+    navBtn.textContent = 'Login';
+    navBtn.onclick = () => { window.location.href = '/login'; };
+    navBtn.dataset.tab = 'login';
+  }
+}
+
+function logout() {
+  fetch(`${API_BASE}/auth/logout`, { method: 'POST', credentials: 'include' }).then(() => {
+    currentUser = null;
+    showNotification('Logged out', 'success');
+    handleAuth();
+    // After logout, go to the dedicated login page
+    window.location.href = '/login';
+  });
+}
+
+async function login() {
+  const email = document.getElementById('loginEmail').value;
+  const password = document.getElementById('loginPassword').value;
+
+  try {
+    const res = await fetch(`${API_BASE}/auth/login`, {
+      method: 'POST',
+      credentials: 'include',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ email, password }),
+    });
+
+    if (res.ok) {
+      currentUser = { email };
+      showNotification('Login successful', 'success');
+      handleAuth();
+      if (typeof loadDashboard === 'function') loadDashboard();
+      if (typeof loadExpenses === 'function') loadExpenses();
+      if (typeof loadGoals === 'function') loadGoals();
+    } else {
+      const data = await safeJson(res);
+      showNotification(data.error || 'Invalid credentials', 'error');
+    }
+  } catch (err) {
+    showNotification('Error: ' + err.message, 'error');
+  }
+}
+
+async function signup() {
+  const username = document.getElementById('signupUsername').value;
+  const email = document.getElementById('signupEmail').value;
+  const password = document.getElementById('signupPassword').value;
+
+  try {
+    const res = await fetch(`${API_BASE}/auth/signup`, {
+      method: 'POST',
+      credentials: 'include',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ username, email, password }),
+    });
+
+    if (res.ok) {
+      currentUser = { username };
+      showNotification('Signup successful', 'success');
+      handleAuth();
+      if (typeof loadDashboard === 'function') loadDashboard();
+    } else {
+      const data = await safeJson(res);
+      showNotification(data.error || 'Signup failed', 'error');
+    }
+  } catch (err) {
+    showNotification('Error: ' + err.message, 'error');
+  }
+}
+
+function logout() {
+  fetch(`${API_BASE}/auth/logout`, { method: 'POST', credentials: 'include' }).then(() => {
+    currentUser = null;
+    showNotification('Logged out', 'success');
+    handleAuth();
+  });
+}
+
+/* ---------- Q&A ---------- */
+const QA_QUESTIONS = [
+  "How much did I spend today?",
+  "How much did I spend this week?",
+  "How much did I spend this month?",
+  "How much did I spend on Food?",
+  "How much did I spend on Food this month?",
+  "What is my highest spending category?",
+  "What is my lowest spending category?",
+  "How much did I spend using UPI?",
+  "How much did I spend using Cash?",
+  "What was my biggest expense?",
+  "What was my smallest expense?",
+  "How many expenses did I log this month?",
+  "What day did I spend the most money?",
+  "What is my average daily spending this month?",
+  "How much have I saved towards my goal?",
+  "How much amount is left to achieve my goal?",
+  "What is my current goal?",
+  "Is my goal completed?",
+  "Show my recent 5 expenses",
+  "How much did I spend this year?",
+];
+
+function populateQA() {
+  const sel = document.getElementById('qaSelect');
+  if (!sel) return;
+  QA_QUESTIONS.forEach((q, i) => {
+    const opt = document.createElement('option');
+    opt.value = (i + 1).toString();
+    opt.textContent = `${i + 1}. ${q}`;
+    sel.appendChild(opt);
+  });
+}
+
+async function askQuestion() {
+  const sel = document.getElementById('qaSelect');
+  const q = parseInt(sel.value || '0');
+  const out = document.getElementById('qaResult');
+  if (!q) return showNotification('Select a question first', 'error');
+
+  try {
+    const res = await fetch(`${API_BASE}/qa`, {
+      method: 'POST',
+      credentials: 'include',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ question_id: q }),
+    });
+    const data = await safeJson(res);
+
+    if (res.ok) {
+      out.innerHTML = `<div class="card"><h3>${data.answer}</h3></div>`;
+    } else {
+      out.innerHTML = `<div class="card"><h3 style="color:#e74c3c">${data.error || 'Error'}</h3></div>`;
+    }
+  } catch (err) {
+    out.innerHTML = `<div class="card"><h3 style="color:#e74c3c">Error: ${err.message}</h3></div>`;
+  }
+}
+
+/* ---------- Init ---------- */
+
+async function init() {
+  // Check server session early. If not authenticated, redirect to landing/login page.
+  try {
+    const r = await fetch('/api/auth/me', { credentials: 'include' });
+    const d = await r.json();
+    if (!d || !d.user_id) {
+      // Not authenticated: show dedicated login page
+      window.location.href = '/login';
+      return;
+    }
+    // We have a logged-in user; set basic identity
+    currentUser = { user_id: d.user_id };
+  } catch (e) {
+    // If check fails, send user to dedicated login page
+    window.location.href = '/login';
+    return;
+  }
+
+  handleAuth();
+  if (typeof loadDashboard === 'function') loadDashboard();
+  if (typeof loadExpenses === 'function') loadExpenses();
+  if (typeof loadGoals === 'function') loadGoals();
+
+  // populate QA list
+  populateQA();
+
+  // Lazy-load analytics when the user opens the tab
+  document.querySelectorAll('.tab-btn').forEach((btn) => {
+    if (btn.dataset.tab === 'analytics') {
+      btn.addEventListener('click', loadAnalytics);
+    }
+  });
+}
+init();
+
+/* ---------- Expose functions globally (handlers in HTML need these) ---------- */
+Object.assign(window, {
+  // Tabs
+  switchTab,
+  // Recording
+  startExpenseRecording,
+  stopExpenseRecording,
+  startGoalRecording,
+  stopGoalRecording,
+  // Submitters
+  submitExpenseAudio,
+  submitGoalAudio,
+  submitManualExpense,
+  // Expenses
+  loadExpenses,
+  deleteExpense,
+  // Goals
+  createGoal,
+  loadGoals,
+  deleteGoal,
+  // Dashboard / Analytics
+  loadDashboard,
+  loadAnalytics,
+  // Auth
+  handleAuth,
+  login,
+  signup,
+  logout,
+  // Utils (optional)
+  showNotification,
+});
@@ -0,0 +1,36 @@
+// Authentication check
+(async function(){
+  try{
+    const r = await fetch('/api/auth/me', {credentials: 'include'});
+    const d = await r.json();
+    if (d && d.user_id) {
+      window.location.href = '/';
+    }
+  }catch(e){ /* ignore */ }
+})();
+
+// Login handler
+document.getElementById('loginForm').addEventListener('submit', async (e) => {
+  e.preventDefault();
+  const email = document.getElementById('email').value;
+  const password = document.getElementById('password').value;
+  const msg = document.getElementById('loginMessage');
+
+  try{
+    const res = await fetch('/api/auth/login', {
+      method: 'POST',
+      credentials: 'include',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ email, password })
+    });
+    const data = await res.json();
+    if (res.ok) {
+      msg.textContent = 'Login successful — redirecting...';
+      setTimeout(() => { window.location.href = '/'; }, 700);
+    } else {
+      msg.textContent = data.error || 'Login failed';
+    }
+  }catch(err){
+    msg.textContent = 'Server unreachable';
+  }
+});
@@ -3,12 +3,15 @@ let mediaRecorder;
 let audioChunks = [];
 
 async function startRecording() {
-  const stream = await navigator.mediaDevices.getUserMedia({ audio: true });
-  mediaRecorder = new MediaRecorder(stream);
+  const stream = await navigator.mediaDevices.getUserMedia({ audio: { channelCount: 1, sampleRate: 16000 } });
+  // Mono at a low bitrate is all speech recognition needs
+  mediaRecorder = new MediaRecorder(stream, { audioBitsPerSecond: 16000 });
 
   mediaRecorder.ondataavailable = e => audioChunks.push(e.data);
   mediaRecorder.onstop = () => {
-    const audioBlob = new Blob(audioChunks, { type: 'audio/wav' });
+    stream.getTracks().forEach(t => t.stop());
+    // Label the blob with what the recorder produced (webm/ogg/mp4), not a guess
+    const audioBlob = new Blob(audioChunks, { type: mediaRecorder.mimeType || 'audio/webm' });
     const audioUrl = URL.createObjectURL(audioBlob);
     document.getElementById('audioPlayback').src = audioUrl;
     document.getElementById('sendExpense').disabled = false;
@@ -0,0 +1,27 @@
+document.getElementById("signupForm").addEventListener("submit", async (e) => {
+    e.preventDefault();
+    const username = document.getElementById("username").value;
+    const email = document.getElementById("email").value;
+    const password = document.getElementById("password").value;
+    const msg = document.getElementById("signupMessage");
+
+    try {
+        const res = await fetch("/api/auth/signup", {
+            method: "POST",
+            credentials: 'include',
+            headers: { "Content-Type": "application/json" },
+            body: JSON.stringify({ username, email, password })
+        });
+
+        const data = await res.json();
+        if (res.ok) {
+            msg.textContent = "Signup successful! Redirecting...";
+            // session is already set; go to app root which will render the main app for logged-in users
+            setTimeout(() => window.location.href = "/", 1200);
+        } else {
+            msg.textContent = data.error || "Signup failed.";
+        }
+    } catch (err) {
+        msg.textContent = "Error: Failed to reach server.";
+    }
+});
@@ -0,0 +1,71 @@
+"""
+Benchmark registered ASR backends on the same audio clips.
+
+    python -m scripts.bench_asr clip1.webm clip2.wav --backends whisper faster-whisper fake --repeat 3
+
+For each backend: model load time, per-clip latency (mean / p50 / max),
+real-time factor (processing time / audio duration; lower is better), peak
+RSS, current RSS split into anonymous (private) vs file-backed (shared
+mmap'd weights, see ASR_SHARED_WEIGHTS) memory, and the transcripts, so
+accuracy can be eyeballed side by side.
+Run each backend in its own process (one --backends value per run) to get
+clean RSS numbers.
+"""
+import argparse
+import resource
+import statistics
+import sys
+import time
+
+from app.asr import SAMPLE_RATE, available_backends, get_backend, load_audio
+from app.metrics import process_memory
+
+
+def peak_rss_mb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def audio_seconds(path):
+    samples = load_audio(path)
+    return len(samples) / SAMPLE_RATE if samples is not None else None
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("clips", nargs="+", help="audio files")
+    ap.add_argument("--backends", nargs="+", default=available_backends())
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    durations = {c: audio_seconds(c) for c in args.clips}
+    total_audio = sum(d for d in durations.values() if d)
+
+    for name in args.backends:
+        engine = get_backend(name)
+        t0 = time.perf_counter()
+        engine.model  # force the load outside the timed transcriptions
+        load_s = time.perf_counter() - t0
+
+        times, texts = [], {}
+        for _ in range(args.repeat):
+            for clip in args.clips:
+                t0 = time.perf_counter()
+                texts[clip] = engine.transcribe(clip)
+                times.append(time.perf_counter() - t0)
+
+        per_pass = sum(times) / args.repeat
+        rtf = f"{per_pass / total_audio:.3f}" if total_audio else "n/a"
+        mem = process_memory()
+        print(f"== {name} ({engine.load_source})")
+        print(f"load {load_s:.2f}s  mean {statistics.mean(times) * 1000:.0f}ms  "
+              f"p50 {statistics.median(times) * 1000:.0f}ms  max {max(times) * 1000:.0f}ms  "
+              f"RTF {rtf}  peak RSS {peak_rss_mb():.0f}MB")
+        print(f"rss_anon {mem.get('rss_anon', 0) / 2**20:.0f}MB  rss_file {mem.get('rss_file', 0) / 2**20:.0f}MB  "
+              f"pss {mem.get('pss', 0) / 2**20:.0f}MB")
+        for clip in args.clips:
+            print(f"  {clip}: {texts[clip]!r}")
+
+
+if __name__ == "__main__":
+    main()
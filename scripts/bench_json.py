@@ -0,0 +1,89 @@
+"""
+Benchmark JSON serialization of expense lists.
+
+    python -m scripts.bench_json [--docs 10000] [--repeat 20]
+
+Compares the old route path (per-document str()/isoformat() copies, then
+Flask's default jsonify) with returning the documents as-is through
+app.json_provider.MongoJSONProvider. No database needed.
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from bson import ObjectId
+from flask import Flask, jsonify
+from flask.json.provider import DefaultJSONProvider
+
+from app.json_provider import MongoJSONProvider, orjson
+
+
+def make_docs(n):
+    uid = ObjectId()
+    now = datetime.utcnow()
+    cats = ["Food", "Transport", "Shopping", "Bills", "Others"]
+    return [
+        {
+            "_id": ObjectId(),
+            "user_id": uid,
+            "amount": round(random.uniform(10, 5000), 2),
+            "category": random.choice(cats),
+            "payment_method": "UPI",
+            "description": "Spent some money on something reasonably descriptive",
+            "timestamp": now - timedelta(minutes=i),
+        }
+        for i in range(n)
+    ]
+
+
+def legacy_convert(docs):
+    out = []
+    for d in docs:
+        d = dict(d)
+        d["_id"] = str(d["_id"])
+        d["user_id"] = str(d["user_id"])
+        if isinstance(d.get("timestamp"), datetime):
+            d["timestamp"] = d["timestamp"].isoformat()
+        out.append(d)
+    return out
+
+
+def timeit(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--docs", type=int, default=10000)
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+
+    docs = make_docs(args.docs)
+    # Sanity check: the provider must handle every type routes hand it
+    MongoJSONProvider(Flask(__name__)).dumps({"d": Decimal("1.5"), "docs": docs[:1]})
+
+    legacy = Flask("legacy")
+    legacy.json = DefaultJSONProvider(legacy)
+    fast = Flask("fast")
+    fast.json = MongoJSONProvider(fast)
+
+    with legacy.test_request_context():
+        t_legacy = timeit(lambda: jsonify({"expenses": legacy_convert(docs)}).get_data(), args.repeat)
+    with fast.test_request_context():
+        t_fast = timeit(lambda: jsonify({"expenses": docs}).get_data(), args.repeat)
+        size = len(jsonify({"expenses": docs}).get_data())
+
+    print(f"{args.docs} docs, {size / 1e6:.2f} MB, encoder={'orjson' if orjson else 'stdlib json'}")
+    print(f"legacy (copy + default jsonify): {t_legacy:8.2f} ms")
+    print(f"MongoJSONProvider (direct):      {t_fast:8.2f} ms  ({t_legacy / t_fast:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
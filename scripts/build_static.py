@@ -0,0 +1,106 @@
+"""
+Build fingerprinted, precompressed static assets into app/static/dist/.
+
+    python -m scripts.build_static
+
+For each .js/.css/.svg/.json file under app/static (except dist/):
+  - minify .js/.css when rjsmin/rcssmin are installed (else copy as-is),
+  - write it as <name>.<sha256[:10]><ext>,
+  - write .gz (always) and .br (when the `brotli` package is installed) next to it,
+and finally write dist/manifest.json. The app picks the manifest up at startup
+(see app/assets.py); rerun after changing any static file and restart. Entries
+whose source has changed since the build are served unbuilt from /static/.
+"""
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import sys
+
+try:
+    import rjsmin
+except ImportError:  # optional
+    rjsmin = None
+try:
+    import rcssmin
+except ImportError:  # optional
+    rcssmin = None
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "app", "static"))
+DIST = os.path.join(ROOT, "dist")
+EXTENSIONS = (".js", ".css", ".svg", ".json")
+
+
+def minify(rel, data):
+    if rel.endswith(".min.js") or rel.endswith(".min.css"):
+        return data
+    if rel.endswith(".js") and rjsmin:
+        return rjsmin.jsmin(data.decode("utf-8")).encode("utf-8")
+    if rel.endswith(".css") and rcssmin:
+        return rcssmin.cssmin(data.decode("utf-8")).encode("utf-8")
+    return data
+
+
+def fingerprinted(rel, data):
+    stem, ext = os.path.splitext(rel)
+    return f"{stem}.{hashlib.sha256(data).hexdigest()[:10]}{ext}"
+
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as fh:
+        fh.write(data)
+
+
+def main():
+    if os.path.isdir(DIST):
+        shutil.rmtree(DIST)
+
+    manifest = {}
+    before = after_gz = after_br = 0
+    for dirpath, dirnames, filenames in os.walk(ROOT):
+        if os.path.abspath(dirpath) == ROOT and "dist" in dirnames:
+            dirnames.remove("dist")
+        for name in sorted(filenames):
+            if not name.endswith(EXTENSIONS):
+                continue
+            src = os.path.join(dirpath, name)
+            rel = os.path.relpath(src, ROOT).replace(os.sep, "/")
+            with open(src, "rb") as fh:
+                raw = fh.read()
+            data = minify(rel, raw)
+            out_rel = fingerprinted(rel, data)
+            out = os.path.join(DIST, out_rel)
+            write(out, data)
+            gz = gzip.compress(data, compresslevel=9, mtime=0)
+            write(out + ".gz", gz)
+            br = brotli.compress(data, quality=11) if brotli else None
+            if br is not None:
+                write(out + ".br", br)
+            # The app compares source_sha256 with the file on disk at startup and
+            # ignores entries whose source changed since this build
+            manifest[rel] = {"file": out_rel, "source_sha256": hashlib.sha256(raw).hexdigest()}
+
+            before += len(raw)
+            after_gz += len(gz)
+            after_br += len(br) if br is not None else len(gz)
+            sizes = f"{len(raw):>9} -> {len(data):>9} min, {len(gz):>8} gz"
+            if br is not None:
+                sizes += f", {len(br):>8} br"
+            print(f"{rel:28s} {sizes}  {out_rel}")
+
+    write(os.path.join(DIST, "manifest.json"), json.dumps(manifest, indent=2, sort_keys=True).encode("utf-8"))
+    print(f"{len(manifest)} assets: {before} bytes -> {after_gz} gzip / {after_br} best")
+    if not (rjsmin and rcssmin):
+        print("note: pip install rjsmin rcssmin to minify", file=sys.stderr)
+    if not brotli:
+        print("note: pip install brotli to emit .br variants", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
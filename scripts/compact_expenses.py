@@ -0,0 +1,114 @@
+"""
+Archive closed months of expenses into per-user monthly buckets.
+
+    EXPENSE_BUCKETS=1 python -m scripts.compact_expenses [--user <id>] [--keep-months 1] [--stats]
+
+Every expense older than the start of the current month (or `--keep-months`
+months back) is moved out of `expenses` into one `expense_buckets` document per
+user per month. Reads go through app.models.list_expenses / aggregate_expenses,
+which union live and bucketed rows, so the app must run with EXPENSE_BUCKETS=1
+once any data has been compacted.
+
+With --stats, collection storage/index sizes and the latency of a typical
+list + monthly aggregation are printed before and after compaction.
+"""
+import argparse
+import sys
+import time
+from datetime import datetime
+
+from app import create_app
+from app.models import get_db, list_expenses, aggregate_expenses, compact_expenses, ensure_bucket_indexes, BUCKETS
+
+
+def month_start(now, months_back):
+    y, m = now.year, now.month - months_back
+    while m < 1:
+        y, m = y - 1, m + 12
+    return datetime(y, m, 1)
+
+
+def storage_stats(db):
+    out = {}
+    for name in ("expenses", BUCKETS):
+        s = db.command("collStats", name)
+        out[name] = {
+            "count": s.get("count", 0),
+            "size": s.get("size", 0),
+            "storageSize": s.get("storageSize", 0),
+            "totalIndexSize": s.get("totalIndexSize", 0),
+        }
+    return out
+
+
+def query_timing(user_ids, repeat=5):
+    """Mean ms for the reads the dashboard issues: recent list + 6-month trend."""
+    if not user_ids:
+        return {}
+    since = month_start(datetime.utcnow(), 6)
+    t_list = t_agg = 0.0
+    for _ in range(repeat):
+        for uid in user_ids:
+            t0 = time.perf_counter()
+            list_expenses(uid, limit=50)
+            t1 = time.perf_counter()
+            aggregate_expenses(
+                {"user_id": uid, "timestamp": {"$gte": since}},
+                [{"$group": {"_id": {"$dateToString": {"format": "%Y-%m", "date": "$timestamp"}}, "total": {"$sum": "$amount"}}}],
+            )
+            t2 = time.perf_counter()
+            t_list += t1 - t0
+            t_agg += t2 - t1
+    n = repeat * len(user_ids)
+    return {"list_expenses_ms": 1000 * t_list / n, "month_wise_ms": 1000 * t_agg / n}
+
+
+def print_report(label, stats, timing):
+    print(f"--- {label} ---")
+    for name, s in stats.items():
+        print(
+            f"{name:16s} docs={s['count']:>10} data={s['size'] / 1e6:9.2f}MB "
+            f"storage={s['storageSize'] / 1e6:9.2f}MB indexes={s['totalIndexSize'] / 1e6:9.2f}MB"
+        )
+    for k, v in timing.items():
+        print(f"{k:16s} {v:8.2f}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--user", help="only compact this user id")
+    ap.add_argument("--keep-months", type=int, default=0, help="closed months to keep live (default 0)")
+    ap.add_argument("--stats", action="store_true", help="report storage and query time before/after")
+    args = ap.parse_args()
+
+    app = create_app()
+    if not app.config.get("EXPENSE_BUCKETS"):
+        sys.exit("EXPENSE_BUCKETS is off: compacted expenses would be invisible to the app. Set EXPENSE_BUCKETS=1.")
+
+    with app.app_context():
+        db = get_db()
+        ensure_bucket_indexes(db)
+        before = month_start(datetime.utcnow(), args.keep_months)
+        if args.user:
+            from bson import ObjectId
+            user_ids = [ObjectId(args.user)]
+        else:
+            user_ids = db.expenses.distinct("user_id", {"timestamp": {"$lt": before}})
+
+        sample = user_ids[:20]
+        if args.stats:
+            print_report("before", storage_stats(db), query_timing(sample))
+
+        moved = 0
+        t0 = time.perf_counter()
+        for uid in user_ids:
+            moved += compact_expenses(uid, before)
+        print(f"compacted {moved} expenses for {len(user_ids)} users older than {before:%Y-%m-%d} "
+              f"in {time.perf_counter() - t0:.1f}s")
+
+        if args.stats:
+            print_report("after", storage_stats(db), query_timing(sample))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Recompute per-user spending insights for /api/insights.
+
+    python -m scripts.compute_insights [--workers 8] [--days 400] [--user <id>]
+
+Run it from cron (e.g. nightly). Users are spread over a process pool. Each
+worker opens its own Mongo connection, streams a user's expenses in chunks
+into NumPy arrays (see app/insights.py) and returns one compact document.
+The parent upserts those into `insights` in batches. With --user, one user is
+computed inline and printed instead of stored.
+"""
+import argparse
+import os
+import pprint
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from bson import ObjectId
+from pymongo import MongoClient, ReplaceOne
+
+from app.config import Config
+from app.insights import CHUNK_ROWS, DEFAULT_DAYS, compute_user_insights
+from app.models import INSIGHTS
+
+_db = None
+_opts = {}
+
+
+def _init_worker(mongo_uri, opts):
+    # MongoClient is not fork-safe: every worker connects on its own
+    global _db, _opts
+    _db = MongoClient(mongo_uri).get_default_database()
+    _opts = opts
+
+
+def _compute(uid):
+    goals = list(_db.goals.find({"user_id": uid}))
+    return compute_user_insights(_db, uid, goals, **_opts)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--mongo-uri", default=Config.MONGO_URI)
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--days", type=int, default=DEFAULT_DAYS, help="history window in days")
+    ap.add_argument("--chunk", type=int, default=CHUNK_ROWS, help="expenses per streamed chunk")
+    ap.add_argument("--batch", type=int, default=500, help="insight documents per bulk write")
+    ap.add_argument("--user", help="compute one user inline and print the result")
+    args = ap.parse_args()
+
+    opts = {"now": datetime.utcnow(), "days": args.days, "chunk": args.chunk, "buckets": Config.EXPENSE_BUCKETS}
+
+    if args.user:
+        _init_worker(args.mongo_uri, opts)
+        pprint.pprint(_compute(ObjectId(args.user)))
+        return
+
+    db = MongoClient(args.mongo_uri).get_default_database()
+    uids = [u["_id"] for u in db.users.find({}, {"_id": 1})]
+    print(f"users: {len(uids)}, workers: {args.workers}")
+
+    t0 = time.perf_counter()
+    done = rows = 0
+    ops = []
+    with ProcessPoolExecutor(
+        max_workers=args.workers, initializer=_init_worker, initargs=(args.mongo_uri, opts)
+    ) as pool:
+        for doc in pool.map(_compute, uids, chunksize=max(1, len(uids) // (args.workers * 16))):
+            ops.append(ReplaceOne({"_id": doc["_id"]}, doc, upsert=True))
+            rows += doc["rows"]
+            if len(ops) >= args.batch:
+                db[INSIGHTS].bulk_write(ops, ordered=False)
+                done += len(ops)
+                ops = []
+                print(f"insights: {done} users ({done / (time.perf_counter() - t0):.0f}/s)")
+    if ops:
+        db[INSIGHTS].bulk_write(ops, ordered=False)
+        done += len(ops)
+
+    elapsed = time.perf_counter() - t0
+    print(f"computed insights for {done} users ({rows} expenses) in {elapsed:.1f}s "
+          f"({rows / elapsed if elapsed else 0:.0f} expenses/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Seed a local MongoDB with production-sized synthetic data.
+
+    python -m scripts.db_seed --users 2000 --expenses 2000000 --drop
+
+Users are `seed{i}@seed.local` with a shared password (--password), so
+scripts/load_test.py can log in as any of them. Expenses per user follow a
+heavy-tailed distribution (a few power users own most rows); categories,
+payment methods and amounts are skewed the way real spending is. Everything
+is written with batched insert_many.
+"""
+import argparse
+import math
+import random
+import time
+from bisect import bisect_right
+from datetime import datetime, timedelta
+
+from pymongo import MongoClient
+from werkzeug.security import generate_password_hash
+
+from app.config import Config
+from app.idempotency import COLLECTION as IDEMPOTENCY_KEYS
+from app.models import BUCKETS, INSIGHTS, ensure_search_indexes, search_tokens
+from app.routes import CATEGORY_KEYWORDS, goal_slug
+
+# Relative frequency and (median amount, spread) in INR per category
+CATEGORY_WEIGHTS = {
+    "Food": 34, "Transport": 20, "Shopping": 12, "Bills": 9, "Entertainment": 7,
+    "Health": 5, "Education": 3, "Rent": 2, "Travel": 3, "Others": 5,
+}
+AMOUNT_PROFILE = {
+    "Food": (180, 0.7), "Transport": (120, 0.8), "Shopping": (1200, 1.0), "Bills": (600, 0.7),
+    "Entertainment": (400, 0.6), "Health": (500, 0.9), "Education": (2500, 1.0), "Rent": (12000, 0.3),
+    "Travel": (4000, 1.0), "Others": (300, 1.0),
+}
+PAYMENT_WEIGHTS = {"UPI": 45, "Google Pay": 15, "PhonePe": 10, "Cash": 15, "Card": 10, "Paytm": 3, "Unknown": 2}
+GOAL_NAMES = ["watch", "laptop", "vacation", "emergency fund", "bike", "phone", "wedding", "course fees"]
+TEMPLATES = [
+    "spent {amount} on {kw}",
+    "{amount} for {kw} via {pm}",
+    "paid {amount} rupees for {kw} using {pm}",
+    "{kw} {amount}",
+]
+
+
+def weighted(rng, weights):
+    keys = list(weights)
+    cum, total = [], 0
+    for k in keys:
+        total += weights[k]
+        cum.append(total)
+    return lambda: keys[bisect_right(cum, rng.random() * total)]
+
+
+def expenses_per_user(rng, n_users, n_expenses):
+    """Split n_expenses across users with a Pareto-like skew."""
+    raw = [rng.paretovariate(1.2) for _ in range(n_users)]
+    scale = n_expenses / sum(raw)
+    counts = [int(r * scale) for r in raw]
+    for i in range(n_expenses - sum(counts)):
+        counts[i % n_users] += 1
+    return counts
+
+
+def make_expense(rng, uid, now, days, pick_cat, pick_pm):
+    cat = pick_cat()
+    pm = pick_pm()
+    median, spread = AMOUNT_PROFILE[cat]
+    amount = round(median * math.exp(rng.gauss(0, spread)), 2)
+    kw = rng.choice(CATEGORY_KEYWORDS.get(cat) or ["misc"])
+    desc = rng.choice(TEMPLATES).format(amount=int(amount), kw=kw, pm=pm.lower())
+    # Recent days are denser than old ones
+    age = days * (rng.random() ** 2)
+    doc = {
+        "user_id": uid,
+        "amount": amount,
+        "category": cat,
+        "payment_method": pm,
+        "description": desc.capitalize(),
+        "timestamp": now - timedelta(days=age),
+        "search_tokens": search_tokens(desc),
+    }
+    if rng.random() < 0.01:
+        doc["amount"] = 0.0
+        doc["meta"] = {"status": "pending_amount"}
+    return doc
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--mongo-uri", default=Config.MONGO_URI)
+    ap.add_argument("--users", type=int, default=1000)
+    ap.add_argument("--expenses", type=int, default=1_000_000)
+    ap.add_argument("--days", type=int, default=730, help="spread expenses over this many days back")
+    ap.add_argument("--password", default="seedpass")
+    ap.add_argument("--batch", type=int, default=5000)
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--drop", action="store_true", help="drop users/expenses/goals and derived collections first")
+    ap.add_argument("--create-indexes", action="store_true", help="create user_id/timestamp and search indexes")
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    db = MongoClient(args.mongo_uri).get_default_database()
+    if args.drop:
+        for name in ("users", "expenses", "goals", BUCKETS, INSIGHTS, IDEMPOTENCY_KEYS):
+            db.drop_collection(name)
+
+    t0 = time.perf_counter()
+    now = datetime.utcnow()
+    pw_hash = generate_password_hash(args.password)  # hashing is slow; one hash serves every seed user
+    users = [
+        {"username": f"seed{i}", "email": f"seed{i}@seed.local", "password_hash": pw_hash,
+         "created_at": now - timedelta(days=args.days)}
+        for i in range(args.users)
+    ]
+    for i in range(0, len(users), args.batch):
+        db.users.insert_many(users[i:i + args.batch], ordered=False)
+    uids = [u["_id"] for u in users]
+    print(f"users: {len(uids)}")
+
+    goals = []
+    for uid in uids:
+        for name in rng.sample(GOAL_NAMES, rng.choice([0, 1, 1, 2, 3])):
+            target = float(rng.choice([5000, 15000, 50000, 100000, 250000]))
+            saved = round(target * rng.random() * 1.1, 2)
+            goals.append({
+                "user_id": uid, "goal_name": name, "slug": goal_slug(name), "target_amount": target,
+                "saved_amount": saved, "currency": "INR", "is_completed": saved >= target,
+                "created_at": now - timedelta(days=rng.random() * args.days), "updated_at": now,
+            })
+    if goals:
+        db.goals.insert_many(goals, ordered=False)
+    print(f"goals: {len(goals)}")
+
+    pick_cat = weighted(rng, CATEGORY_WEIGHTS)
+    pick_pm = weighted(rng, PAYMENT_WEIGHTS)
+    batch, written = [], 0
+    for uid, n in zip(uids, expenses_per_user(rng, len(uids), args.expenses)):
+        for _ in range(n):
+            batch.append(make_expense(rng, uid, now, args.days, pick_cat, pick_pm))
+            if len(batch) >= args.batch:
+                db.expenses.insert_many(batch, ordered=False)
+                written += len(batch)
+                batch = []
+                if written % (args.batch * 40) == 0:
+                    print(f"expenses: {written} ({written / (time.perf_counter() - t0):.0f}/s)")
+    if batch:
+        db.expenses.insert_many(batch, ordered=False)
+        written += len(batch)
+    print(f"expenses: {written}")
+
+    if args.create_indexes:
+        db.users.create_index("email", unique=True)
+        ensure_search_indexes(db)  # includes user_id/timestamp
+        db.goals.create_index([("user_id", 1), ("slug", 1)])
+
+    print(f"done in {time.perf_counter() - t0:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Write the memory-mappable fp32 copy of a Whisper model used by ASR_SHARED_WEIGHTS.
+
+    ASR_SHARED_WEIGHTS=/var/lib/voice-expense/asr WHISPER_MODEL=base python -m scripts.export_asr_weights
+
+Run once per host (or bake into the image) before starting the workers, so no
+worker pays the export on its first load. Then load it back and report timing
+and memory as the workers would see them.
+"""
+import argparse
+import os
+import sys
+import time
+
+from app.asr import export_shared_weights, load_shared_weights, shared_weights_path
+from app.metrics import process_memory
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--model", default=os.environ.get("WHISPER_MODEL", "base"))
+    ap.add_argument("--force", action="store_true", help="re-export even if the file exists")
+    args = ap.parse_args()
+
+    path = shared_weights_path(args.model)
+    if not path:
+        sys.exit("Set ASR_SHARED_WEIGHTS to the directory the workers will read weights from.")
+
+    if args.force or not os.path.exists(path):
+        t0 = time.perf_counter()
+        export_shared_weights(args.model, path)
+        print(f"exported {args.model} to {path} ({os.path.getsize(path) / 2**20:.0f}MB) "
+              f"in {time.perf_counter() - t0:.1f}s")
+
+    t0 = time.perf_counter()
+    load_shared_weights(path)
+    mem = process_memory()
+    print(f"mmap load {time.perf_counter() - t0:.3f}s  rss_anon {mem.get('rss_anon', 0) / 2**20:.0f}MB  "
+          f"rss_file {mem.get('rss_file', 0) / 2**20:.0f}MB  pss {mem.get('pss', 0) / 2**20:.0f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+"""
+Create or update the TTL index that expires Idempotency-Key replays.
+
+    python -m scripts.idempotency_index
+
+Required migration: run it on every deploy. It creates the `idempotency_keys`
+index on created_at with IDEMPOTENCY_TTL_SECONDS, or changes the expiry in place
+(collMod) when that setting changed. Without it, stored replays never expire.
+"""
+import argparse
+
+from app import create_app
+from app.idempotency import COLLECTION, ensure_idempotency_indexes
+from app.models import get_db
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        db = get_db()
+        ttl = app.config["IDEMPOTENCY_TTL_SECONDS"]
+        ensure_idempotency_indexes(db, ttl)
+        print(f"{COLLECTION}: created_at TTL index expires after {ttl}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+HTTP load driver for a locally running app (seed it first with scripts/db_seed.py).
+
+    python -m scripts.load_test --base-url http://127.0.0.1:5000 --workers 16 --duration 60
+
+Each worker logs in as a random seed user and replays a weighted mix of
+dashboard, expense list, Q&A, text POST and voice POST requests. At the end it
+prints throughput and p50/p95/p99 latency per endpoint.
+
+Voice POSTs upload --audio if given, else one second of generated silence plus
+a `transcript` form field, which only exercises the full path when the server
+runs with ASR_BACKEND=browser.
+"""
+import argparse
+import io
+import json
+import math
+import random
+import threading
+import time
+import uuid
+import wave
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from http.cookiejar import CookieJar
+from urllib.error import HTTPError
+from urllib.request import HTTPCookieProcessor, Request, build_opener
+
+TEXT_SAMPLES = [
+    "spent 250 on pizza via upi",
+    "120 for uber using cash",
+    "paid 1,499 for netflix subscription by card",
+    "900 on groceries with google pay",
+    "movie tickets 600",
+]
+
+
+def silent_wav(seconds=1.0, rate=16000):
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(b"\x00\x00" * int(seconds * rate))
+    return buf.getvalue()
+
+
+def multipart(fields, files):
+    boundary = uuid.uuid4().hex
+    out = io.BytesIO()
+    for name, value in fields.items():
+        out.write(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    for name, (filename, data, ctype) in files.items():
+        out.write(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+            f"Content-Type: {ctype}\r\n\r\n".encode()
+        )
+        out.write(data)
+        out.write(b"\r\n")
+    out.write(f"--{boundary}--\r\n".encode())
+    return out.getvalue(), f"multipart/form-data; boundary={boundary}"
+
+
+class Client:
+    def __init__(self, base_url):
+        self.base = base_url.rstrip("/")
+        self.opener = build_opener(HTTPCookieProcessor(CookieJar()))
+
+    def request(self, method, path, body=None, ctype=None):
+        req = Request(self.base + path, data=body, method=method)
+        if ctype:
+            req.add_header("Content-Type", ctype)
+        try:
+            with self.opener.open(req, timeout=120) as resp:
+                resp.read()
+                return resp.status
+        except HTTPError as e:
+            e.read()
+            return e.code
+
+    def json(self, method, path, payload):
+        return self.request(method, path, json.dumps(payload).encode(), "application/json")
+
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latency = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def record(self, name, seconds, status):
+        with self.lock:
+            self.latency[name].append(seconds)
+            if status >= 400:
+                self.errors[name] += 1
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    # nearest-rank
+    k = max(0, math.ceil(p / 100.0 * len(sorted_values)) - 1)
+    return sorted_values[k]
+
+
+DASHBOARD_PATHS = ("/api/analytics/summary", "/api/analytics/category-wise", "/api/analytics/month-wise")
+
+
+def build_scenarios(args, audio):
+    def dashboard(c):
+        # Everything the dashboard page loads: summary card plus both charts
+        return max(c.request("GET", path) for path in DASHBOARD_PATHS)
+
+    def expense_list(c):
+        return c.request("GET", "/api/expenses?limit=50")
+
+    def qa(c):
+        return c.json("POST", "/api/qa", {"question_id": random.randint(1, 20)})
+
+    def text_post(c):
+        return c.json("POST", "/api/expenses", {"description": random.choice(TEXT_SAMPLES)})
+
+    def voice_post(c):
+        filename, data, ctype = audio
+        body, mp = multipart({"transcript": random.choice(TEXT_SAMPLES)}, {"audio": (filename, data, ctype)})
+        return c.request("POST", "/api/expenses/upload-audio", body, mp)
+
+    scenarios = {
+        "dashboard": (dashboard, args.w_dashboard),
+        "expense_list": (expense_list, args.w_list),
+        "qa": (qa, args.w_qa),
+        "text_post": (text_post, args.w_text),
+        "voice_post": (voice_post, args.w_voice),
+    }
+    return {k: v for k, v in scenarios.items() if v[1] > 0}
+
+
+def worker(args, scenarios, stats, deadline):
+    c = Client(args.base_url)
+    user = random.randrange(args.users)
+    try:
+        status = c.json("POST", "/api/auth/login", {"email": f"seed{user}@seed.local", "password": args.password})
+    except Exception:
+        status = 599
+    if status != 200:
+        stats.record("login", 0.0, status)
+        return
+    names = list(scenarios)
+    weights = [scenarios[n][1] for n in names]
+    while time.monotonic() < deadline:
+        name = random.choices(names, weights)[0]
+        t0 = time.perf_counter()
+        try:
+            status = scenarios[name][0](c)
+        except Exception:
+            status = 599
+        stats.record(name, time.perf_counter() - t0, status)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--base-url", default="http://127.0.0.1:5000")
+    ap.add_argument("--workers", type=int, default=8)
+    ap.add_argument("--duration", type=float, default=30.0, help="seconds")
+    ap.add_argument("--users", type=int, default=1000, help="number of seed users to log in as")
+    ap.add_argument("--password", default="seedpass")
+    ap.add_argument("--audio", help="audio file to upload for voice POSTs")
+    ap.add_argument("--w-dashboard", type=float, default=30)
+    ap.add_argument("--w-list", type=float, default=30)
+    ap.add_argument("--w-qa", type=float, default=15)
+    ap.add_argument("--w-text", type=float, default=15)
+    ap.add_argument("--w-voice", type=float, default=10)
+    args = ap.parse_args()
+
+    if args.audio:
+        with open(args.audio, "rb") as fh:
+            name = args.audio.rsplit("/", 1)[-1]
+            ctype = "audio/webm" if name.endswith(".webm") else "audio/ogg" if name.endswith(".ogg") else "audio/wav"
+            audio = (name, fh.read(), ctype)
+    else:
+        audio = ("silence.wav", silent_wav(), "audio/wav")
+
+    scenarios = build_scenarios(args, audio)
+    stats = Stats()
+    t0 = time.monotonic()
+    deadline = t0 + args.duration
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        for _ in range(args.workers):
+            pool.submit(worker, args, scenarios, stats, deadline)
+    elapsed = time.monotonic() - t0
+
+    total = sum(len(v) for v in stats.latency.values())
+    print(f"{total} requests in {elapsed:.1f}s with {args.workers} workers: {total / elapsed:.1f} req/s")
+    print(f"{'endpoint':14s} {'count':>7s} {'req/s':>8s} {'p50 ms':>8s} {'p95 ms':>8s} {'p99 ms':>8s} {'errors':>7s}")
+    for name in sorted(stats.latency):
+        lat = sorted(stats.latency[name])
+        print(
+            f"{name:14s} {len(lat):7d} {len(lat) / elapsed:8.1f} "
+            f"{percentile(lat, 50) * 1000:8.1f} {percentile(lat, 95) * 1000:8.1f} {percentile(lat, 99) * 1000:8.1f} "
+            f"{stats.errors[name]:7d}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Create the expense search indexes and backfill `search_tokens`.
+
+    python -m scripts.search_index [--batch 1000] [--bench]
+
+Required migration: run it on every deploy. Without its indexes a search scans
+every expense the user has. New expenses get their tokens when they are written
+(app.models.search_tokens) and buckets get their token set when compacted. This
+backfills rows and buckets written before that, in live `expenses` and in
+`expense_buckets`, and is safe to re-run: only rows without tokens are touched.
+
+With --bench, the user with the most expenses is searched for a few typical
+queries and the mean latency of the first page and of the count/sum is printed.
+"""
+import argparse
+import statistics
+import time
+
+from pymongo import UpdateOne
+
+from app import create_app
+from app.models import (
+    get_db, ensure_search_indexes, search_tokens, search_match, search_expenses, search_totals,
+    bucket_token_set, BUCKETS, BUCKET_TOKEN_SET,
+)
+
+BENCH_QUERIES = [
+    {"q": "uber"},
+    {"q": "tea"},
+    {"q": "ca"},
+    {"category": "Food"},
+    {"q": "coffee", "min_amount": 100.0},
+]
+
+
+def backfill_expenses(db, batch):
+    ops, done = [], 0
+    for doc in db.expenses.find({"search_tokens": {"$exists": False}}, {"description": 1}):
+        ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"search_tokens": search_tokens(doc.get("description"))}}))
+        if len(ops) >= batch:
+            db.expenses.bulk_write(ops, ordered=False)
+            done += len(ops)
+            ops = []
+    if ops:
+        db.expenses.bulk_write(ops, ordered=False)
+        done += len(ops)
+    return done
+
+
+def backfill_buckets(db):
+    done = 0
+    missing = {"$or": [{"search_tokens": {"$exists": False}}, {BUCKET_TOKEN_SET: {"$exists": False}}]}
+    for bucket in db[BUCKETS].find(missing, {"descriptions": 1, "search_tokens": 1}):
+        descriptions = bucket.get("descriptions") or []
+        column = list(bucket.get("search_tokens") or [])
+        column += [None] * (len(descriptions) - len(column))
+        column = [tokens if tokens is not None else search_tokens(d) for tokens, d in zip(column, descriptions)]
+        db[BUCKETS].update_one(
+            {"_id": bucket["_id"]},
+            {"$set": {"search_tokens": column, BUCKET_TOKEN_SET: bucket_token_set(column)}},
+        )
+        done += 1
+    return done
+
+
+def bench(db, repeat):
+    top = list(db.expenses.aggregate([
+        {"$group": {"_id": "$user_id", "n": {"$sum": 1}}},
+        {"$sort": {"n": -1}},
+        {"$limit": 1},
+    ]))
+    if not top:
+        print("no expenses to search")
+        return
+    uid, n = top[0]["_id"], top[0]["n"]
+    print(f"user {uid} with {n} live expenses")
+    for params in BENCH_QUERIES:
+        match = search_match(uid, **params)
+        page_ms, totals_ms = [], []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            search_expenses(match, limit=50)
+            t1 = time.perf_counter()
+            count, total = search_totals(match)
+            t2 = time.perf_counter()
+            page_ms.append(1000 * (t1 - t0))
+            totals_ms.append(1000 * (t2 - t1))
+        print(f"{str(params):45s} matched={count:>8} page {statistics.mean(page_ms):7.2f}ms  "
+              f"count+sum {statistics.mean(totals_ms):8.2f}ms")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--batch", type=int, default=1000)
+    ap.add_argument("--bench", action="store_true", help="time typical searches for the largest user")
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        db = get_db()
+        t0 = time.perf_counter()
+        ensure_search_indexes(db)
+        print(f"indexes ready in {time.perf_counter() - t0:.1f}s")
+
+        t0 = time.perf_counter()
+        n_live = backfill_expenses(db, args.batch)
+        n_buckets = backfill_buckets(db)
+        print(f"backfilled {n_live} expenses and {n_buckets} buckets in {time.perf_counter() - t0:.1f}s")
+
+        if args.bench:
+            bench(db, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
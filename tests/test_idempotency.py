@@ -0,0 +1,36 @@
+import io
+
+from flask import Flask
+from werkzeug.test import EnvironBuilder
+
+from app.idempotency import request_fingerprint
+
+
+def _fingerprint(app, **kwargs):
+    environ = EnvironBuilder(path="/api/expenses/upload-audio", method="POST", **kwargs).get_environ()
+    with app.request_context(environ):
+        return request_fingerprint()
+
+
+def test_fingerprint_follows_the_body():
+    app = Flask(__name__)
+    assert _fingerprint(app, json={"amount": 10}) == _fingerprint(app, json={"amount": 10})
+    assert _fingerprint(app, json={"amount": 10}) != _fingerprint(app, json={"amount": 99})
+
+
+def test_multipart_fingerprint_ignores_the_boundary():
+    app = Flask(__name__)
+
+    def upload(audio, boundary):
+        body = (
+            f"--{boundary}\r\n"
+            'Content-Disposition: form-data; name="audio"; filename="a.webm"\r\n\r\n'
+            f"{audio}\r\n--{boundary}--\r\n"
+        )
+        return _fingerprint(
+            app, input_stream=io.BytesIO(body.encode()),
+            content_type=f"multipart/form-data; boundary={boundary}", content_length=len(body),
+        )
+
+    assert upload("abc", "b1") == upload("abc", "b2")
+    assert upload("abc", "b1") != upload("xyz", "b1")
@@ -0,0 +1,37 @@
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from app.insights import _Accumulator, project_goals
+
+NOW = datetime(2026, 3, 15, 12)
+
+
+def test_daily_totals_per_category():
+    start = datetime(2026, 3, 1)
+    acc = _Accumulator(start, days=15, recent_start=start)
+    acc.add(
+        [1, 2, 3, 4],
+        [start, start + timedelta(hours=5), start + timedelta(days=2), start - timedelta(days=1)],
+        ["Food", "Food", None, "Food"],
+        [100.0, 50.0, 20.0, 999.0],
+        ["a", "b", "c", "too old"],
+    )
+    food, others = acc.categories["Food"], acc.categories["Others"]
+    assert acc.rows == 3
+    assert acc.daily[0, food] == 150.0
+    assert acc.daily[2, others] == 20.0
+    assert acc.daily.sum() == 170.0
+
+
+def test_goal_projection_uses_average_saving_rate():
+    goals = [
+        {"_id": ObjectId(), "goal_name": "bike", "target_amount": 5000.0, "saved_amount": 1000.0,
+         "created_at": NOW - timedelta(days=10)},
+        {"_id": ObjectId(), "goal_name": "new", "target_amount": 100.0, "saved_amount": 0.0, "created_at": NOW},
+    ]
+    bike, new = project_goals(goals, NOW)
+    assert bike["daily_rate"] == 100.0
+    assert bike["days_left"] == 40
+    assert bike["projected_date"] == NOW + timedelta(days=40)
+    assert new["projected_date"] is None
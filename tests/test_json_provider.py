@@ -0,0 +1,15 @@
+from datetime import datetime
+
+from bson import Int64, ObjectId
+from flask import Flask
+
+from app.json_provider import MongoJSONProvider
+
+
+def test_mongo_types_serialize():
+    app = Flask(__name__)
+    app.json = MongoJSONProvider(app)
+    oid = ObjectId()
+    with app.app_context():
+        out = app.json.loads(app.json.dumps({"_id": oid, "n": Int64(5), "at": datetime(2024, 5, 1, 12, 30)}))
+    assert out == {"_id": str(oid), "n": 5, "at": "2024-05-01T12:30:00"}
@@ -0,0 +1,21 @@
+import json
+
+from app.metrics import REQUEST_LATENCY, REQUESTS, PROCESS_MEMORY, _merged_series
+
+
+def test_workers_are_summed_and_dead_gauges_dropped(tmp_path):
+    other = {
+        REQUESTS.name: [[["index", "GET", "200"], 3]],
+        REQUEST_LATENCY.name: [[["index", "GET"], [1] + [0] * len(REQUEST_LATENCY.buckets) + [0.004, 1]]],
+        PROCESS_MEMORY.name: [[["1", "rss"], 100]],
+    }
+    dead = dict(other, **{PROCESS_MEMORY.name: [[["999999999", "rss"], 200]]})
+    (tmp_path / "1.json").write_text(json.dumps(other))  # pid 1 is always running
+    (tmp_path / "999999999.json").write_text(json.dumps(dead))
+
+    merged = _merged_series(str(tmp_path))
+    mine = REQUESTS.snapshot().get(("index", "GET", "200"), 0)
+    assert merged[REQUESTS.name][("index", "GET", "200")] == 6 + mine
+    assert merged[REQUEST_LATENCY.name][("index", "GET")][0] >= 2
+    assert merged[PROCESS_MEMORY.name][("1", "rss")] == 100
+    assert ("999999999", "rss") not in merged[PROCESS_MEMORY.name]
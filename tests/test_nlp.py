@@ -0,0 +1,62 @@
+from app.nlp_parser import parse_expense_text, split_expense_text
+
+
+def test_single_expense_is_not_split():
+    assert split_expense_text("I spent 500 on pizza via Google Pay") == ["I spent 500 on pizza via Google Pay"]
+
+
+def test_multi_expense_utterance_is_split_per_item():
+    items = split_expense_text("200 on tea, 450 for uber and 1,200 on groceries by UPI")
+    assert items == ["200 on tea", "450 for uber", "1,200 on groceries by UPI"]
+    assert [parse_expense_text(i)["amount"] for i in items] == [200.0, 450.0, 1200.0]
+
+
+def test_segments_without_amount_stay_with_their_neighbour():
+    assert split_expense_text("tea and coffee 200") == ["tea and coffee 200"]
+    assert split_expense_text("200 on tea and coffee") == ["200 on tea and coffee"]
+
+
+def test_amountless_segment_stays_with_previous_item():
+    assert split_expense_text("spent 250 on bread and butter then 100 for milk") == [
+        "spent 250 on bread and butter",
+        "100 for milk",
+    ]
+
+
+def test_quantities_are_not_separate_expenses():
+    assert split_expense_text("spent 500 on pizza and 2 cokes") == ["spent 500 on pizza and 2 cokes"]
+    assert parse_expense_text("bought 2 shirts for 1500")["amount"] == 1500.0
+    assert split_expense_text("paid 5 for parking and 300 on lunch") == ["paid 5 for parking", "300 on lunch"]
+
+
+def test_long_digit_runs_are_not_amounts():
+    assert parse_expense_text("call 9876543210")["amount"] == 0.0
+    assert parse_expense_text("order 123456789 cost 450")["amount"] == 450.0
+    assert split_expense_text("paid 500 for pizza, call 9876543210") == ["paid 500 for pizza and call 9876543210"]
+    assert split_expense_text("paid 500 for pizza, 9876543210 and 300 on lunch") == [
+        "paid 500 for pizza and 9876543210",
+        "300 on lunch",
+    ]
+
+
+def test_items_inherit_the_utterance_payment_method():
+    from app.routes import build_expenses
+
+    docs = build_expenses("200 on tea, 450 for uber by cash and 1,200 on groceries via UPI", "u1")
+    assert [d["amount"] for d in docs] == [200.0, 450.0, 1200.0]
+    assert [d["payment_method"] for d in docs] == ["UPI", "Cash", "UPI"]
+
+
+def test_thousands_separators():
+    assert parse_expense_text("paid 1,200 for shoes")["amount"] == 1200.0
+    assert parse_expense_text("rent 1,20,000")["amount"] == 120000.0
+    assert parse_expense_text("coffee 99.50")["amount"] == 99.5
+
+
+def test_confidence_needs_amount_and_category():
+    from app.config import Config
+    from app.routes import expense_confidence
+
+    assert expense_confidence("spent 500 on pizza") >= Config.ASR_CONFIDENCE_THRESHOLD
+    assert expense_confidence("spent 500 on blorp") < Config.ASR_CONFIDENCE_THRESHOLD
+    assert expense_confidence("pizza") < Config.ASR_CONFIDENCE_THRESHOLD
@@ -0,0 +1,41 @@
+from datetime import datetime
+
+from bson import ObjectId
+
+from app.models import _bucket_match, _bucket_unwind_stages, bucket_token_set, search_match, search_tokens
+
+UID = "5f0000000000000000000000"
+
+
+def test_tokens_include_word_prefixes():
+    tokens = search_tokens("Uber ride 450")
+    assert {"ub", "ube", "uber", "ri", "ride", "450"} <= set(tokens)
+    assert "u" not in tokens
+
+
+def test_match_requires_every_query_word():
+    match = search_match(UID, q="Uber  ri", category="Transport", start=datetime(2024, 1, 1), min_amount=100.0)
+    assert match == {
+        "user_id": ObjectId(UID),
+        "search_tokens": {"$all": ["ri", "uber"]},
+        "category": "Transport",
+        "timestamp": {"$gte": datetime(2024, 1, 1)},
+        "amount": {"$gte": 100.0},
+    }
+
+
+def test_bucket_pages_skip_buckets_after_the_cursor():
+    cursor = (datetime(2024, 3, 10), ObjectId())
+    match = search_match(UID, start=datetime(2024, 1, 1))
+    stages = _bucket_unwind_stages(match, cursor)
+    assert stages[0] == {"$match": {"$and": [
+        {"user_id": ObjectId(UID), "end": {"$gte": datetime(2024, 1, 1)}},
+        {"start": {"$lte": datetime(2024, 3, 10)}},
+    ]}}
+    assert "$unwind" in stages[1]
+
+
+def test_bucket_match_skips_buckets_without_the_query_words():
+    match = search_match(UID, q="uber ride")
+    assert _bucket_match(match)["$or"][0] == {"search_token_set": {"$all": ["ride", "uber"]}}
+    assert bucket_token_set([["te", "tea"], None, ["ub", "tea"]]) == ["te", "tea", "ub"]
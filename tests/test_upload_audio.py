@@ -0,0 +1,51 @@
+import io
+
+import pytest
+
+import app.asr as asr
+import app.routes as routes
+from app import create_app
+
+UID = "5f0000000000000000000000"
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv("FAKE_ASR_TEXT", "spent 250 on pizza via upi")
+    monkeypatch.setattr(asr, "_instances", {})  # FAKE_ASR_TEXT is read when the model loads
+    saved = []
+
+    def create_expenses(uid, items):
+        docs = [dict(item, _id=f"e{i}") for i, item in enumerate(items)]
+        saved.extend(docs)
+        return docs
+
+    monkeypatch.setattr(routes, "create_expenses", create_expenses)
+    app = create_app()
+    app.config.update(TESTING=True, ASR_BACKEND="whisper", ASR_BACKEND_EXPENSES="fake")
+    c = app.test_client()
+    with c.session_transaction() as s:
+        s["user_id"] = UID
+    c.saved = saved
+    return c
+
+
+def test_upload_audio_uses_the_endpoint_backend(client):
+    res = client.post(
+        "/api/expenses/upload-audio",
+        data={"audio": (io.BytesIO(b"RIFF"), "a.wav")},
+        content_type="multipart/form-data",
+    )
+    assert res.status_code == 201
+    assert res.get_json()["transcript"] == "spent 250 on pizza via upi"
+    assert list(asr._instances) == ["fake"]  # the whisper default was never loaded
+    [doc] = client.saved
+    assert (doc["amount"], doc["category"], doc["payment_method"]) == (250.0, "Food", "UPI")
+
+
+def test_goals_fall_back_to_the_default_and_unknown_names_fail(client):
+    assert "fake" in asr.available_backends()
+    with client.application.app_context():
+        assert routes.asr_backend_for("goals") == "whisper"
+        with pytest.raises(RuntimeError, match="Unknown ASR backend"):
+            asr.transcribe("a.wav", "nope")